@@ -1,11 +1,20 @@
 """Assign a specific date to all files in a folder."""
 
 import os
-import re
+import sys
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-from typing import Optional
+from typing import Deque, Iterable, Iterator, List, Optional, Tuple
 
-from constants import PHOTO_EXT, VIDEO_EXT
+from constants import IO_WORKERS, MEDIA_EXT, file_ext
+from walk import iter_files
+
+# Number of buffered output lines written to stdout at a time
+_OUTPUT_BATCH_LINES = 1000
+
+# Date updates submitted ahead of the oldest one still being reported
+_MAX_PENDING_UPDATES = IO_WORKERS * 4
 
 
 def parse_date_string(date_str: str) -> datetime:
@@ -26,43 +35,33 @@ def parse_date_string(date_str: str) -> datetime:
     - Missing minute: 00
     - Missing second: 00
     """
-    date_str = date_str.strip()
-
-    # Pattern: YYYY-MM-DD HH:MM:SS
-    pattern_full = r'^(\d{4})-(\d{2})-(\d{2})\s+(\d{2}):(\d{2}):(\d{2})$'
-    match = re.match(pattern_full, date_str)
-    if match:
-        year, month, day, hour, minute, second = map(int, match.groups())
-        return datetime(year, month, day, hour, minute, second)
-
-    # Pattern: YYYY-MM-DD HH:MM
-    pattern_min = r'^(\d{4})-(\d{2})-(\d{2})\s+(\d{2}):(\d{2})$'
-    match = re.match(pattern_min, date_str)
-    if match:
-        year, month, day, hour, minute = map(int, match.groups())
-        return datetime(year, month, day, hour, minute, 0)
-
-    # Pattern: YYYY-MM-DD
-    pattern_day = r'^(\d{4})-(\d{2})-(\d{2})$'
-    match = re.match(pattern_day, date_str)
-    if match:
-        year, month, day = map(int, match.groups())
-        return datetime(year, month, day, 12, 0, 0)
-
-    # Pattern: YYYY-MM
-    pattern_month = r'^(\d{4})-(\d{2})$'
-    match = re.match(pattern_month, date_str)
-    if match:
-        year, month = map(int, match.groups())
-        return datetime(year, month, 15, 12, 0, 0)
-
-    # Pattern: YYYY
-    pattern_year = r'^(\d{4})$'
-    match = re.match(pattern_year, date_str)
-    if match:
-        year = int(match.group(1))
-        # Middle of year: July 1st (month 7, day 1)
-        return datetime(year, 7, 1, 12, 0, 0)
+    # Collapse runs of whitespace so "YYYY-MM-DD  HH:MM" still parses
+    date_str = " ".join(date_str.split())
+    length = len(date_str)
+
+    try:
+        if length == 4 and date_str.isdigit():
+            # Middle of year: July 1st (month 7, day 1)
+            return datetime(int(date_str), 7, 1, 12, 0, 0)
+
+        if length == 7 and date_str[4] == "-":
+            year, month = date_str[:4], date_str[5:]
+            if year.isdigit() and month.isdigit():
+                return datetime(int(year), int(month), 15, 12, 0, 0)
+
+        if length == 10 and date_str[4] == "-" and date_str[7] == "-":
+            return datetime.fromisoformat(f"{date_str} 12:00:00")
+
+        # fromisoformat would also accept zone offsets and fractions, so
+        # the time may only hold digits and colons
+        if (
+            length in (16, 19)
+            and date_str[10] == " "
+            and date_str[11:].replace(":", "").isdigit()
+        ):
+            return datetime.fromisoformat(date_str)
+    except ValueError:
+        pass
 
     raise ValueError(
         f"Invalid date format: '{date_str}'. "
@@ -71,6 +70,13 @@ def parse_date_string(date_str: str) -> datetime:
     )
 
 
+def _iter_media_files(dirpath: str) -> Iterator[str]:
+    """Recursively yield paths of non-hidden media files under dirpath."""
+    for entry in iter_files(dirpath):
+        if file_ext(entry.name) in MEDIA_EXT:
+            yield entry.path
+
+
 def assign_date(source: str, date_str: str, dry_run: bool = False) -> None:
     """
     Assign a specific date to all media files in a folder.
@@ -91,84 +97,115 @@ def assign_date(source: str, date_str: str, dry_run: bool = False) -> None:
         print(f"Error: {e}")
         return
 
-    print(f"\nAssigning date: {target_date.strftime('%Y-%m-%d %H:%M:%S')}")
+    target_str = target_date.strftime("%Y-%m-%d %H:%M:%S")
+    print(f"\nAssigning date: {target_str}")
 
-    # Collect all media files
-    media_files = []
+    media_files: Iterable[str]
 
     if os.path.isfile(source):
         # Single file mode
         print(f"Source file: {source}\n")
         filename = os.path.basename(source)
-        ext = os.path.splitext(filename.lower())[1]
-
-        if ext in PHOTO_EXT or ext in VIDEO_EXT:
-            media_files.append(source)
+        if file_ext(filename) in MEDIA_EXT:
+            media_files = [source]
         else:
             print(f"Error: {filename} is not a media file.")
-            print(f"Supported formats: {', '.join(sorted(PHOTO_EXT | VIDEO_EXT))}")
+            print(f"Supported formats: {', '.join(sorted(MEDIA_EXT))}")
             return
     else:
-        # Directory mode
+        # Directory mode: files are updated as they are discovered
         print(f"Source folder: {source}\n")
-        for root, _, files in os.walk(source):
-            for filename in files:
-                if filename.startswith("."):
-                    continue
-
-                ext = os.path.splitext(filename.lower())[1]
-                if ext in PHOTO_EXT or ext in VIDEO_EXT:
-                    file_path = os.path.join(root, filename)
-                    media_files.append(file_path)
-
-    if not media_files:
-        print("No media files found in the specified folder.")
-        return
-
-    print(f"Found {len(media_files)} media file(s)\n")
+        media_files = _iter_media_files(source)
 
     # Assign date to each file
+    found_count = 0
     updated_count = 0
     skipped_count = 0
     error_count = 0
 
     timestamp = target_date.timestamp()
 
-    for file_path in media_files:
-        filename = os.path.basename(file_path)
-
-        # Get current modification time
-        try:
-            current_mtime = datetime.fromtimestamp(os.path.getmtime(file_path))
-        except Exception as e:
-            print(f"  [!] Could not read {filename}: {e}")
-            error_count += 1
-            continue
-
-        # Check if already has the target date (within 1 second tolerance)
-        time_diff = abs((target_date - current_mtime).total_seconds())
-        if time_diff < 1:
-            skipped_count += 1
-            continue
-
-        # Update the date
-        if dry_run:
-            print(f"[DRY RUN] {filename}")
-            print(f"  Current:  {current_mtime.strftime('%Y-%m-%d %H:%M:%S')}")
-            print(f"  New:      {target_date.strftime('%Y-%m-%d %H:%M:%S')}")
-            updated_count += 1
-        else:
+    # Per-file lines are buffered and written in batches rather than one
+    # print() (and stdout lock/flush) per line
+    buf: List[str] = []
+
+    def flush_output() -> None:
+        if buf:
+            sys.stdout.write("\n".join(buf) + "\n")
+            buf.clear()
+
+    # os.utime releases the GIL, so updates overlap on high-latency storage.
+    # They are reported oldest first once enough are in flight, keeping
+    # memory bounded and the log in walk order
+    pending: Deque[Tuple[Future, str, datetime]] = deque()
+
+    def report_updates(limit: int) -> None:
+        """Report the oldest pending updates until at most limit remain."""
+        nonlocal updated_count, error_count
+        while len(pending) > limit:
+            future, filename, current_mtime = pending.popleft()
             try:
-                os.utime(file_path, (timestamp, timestamp))
-                print(f"Updated: {filename}")
-                print(f"  {current_mtime.strftime('%Y-%m-%d %H:%M:%S')} -> {target_date.strftime('%Y-%m-%d %H:%M:%S')}")
+                future.result()
+                buf.append(f"Updated: {filename}")
+                buf.append(f"  {current_mtime.strftime('%Y-%m-%d %H:%M:%S')} -> {target_str}")
                 updated_count += 1
             except Exception as e:
-                print(f"  [!] Could not update {filename}: {e}")
+                buf.append(f"  [!] Could not update {filename}: {e}")
+                error_count += 1
+            if len(buf) >= _OUTPUT_BATCH_LINES:
+                flush_output()
+    # Dry runs only report, so they never start worker threads
+    pool: Optional[ThreadPoolExecutor] = (
+        None if dry_run else ThreadPoolExecutor(max_workers=IO_WORKERS)
+    )
+    try:
+        for file_path in media_files:
+            found_count += 1
+            filename = os.path.basename(file_path)
+
+            # Get current modification time
+            try:
+                current_mtime_ts = os.path.getmtime(file_path)
+            except Exception as e:
+                buf.append(f"  [!] Could not read {filename}: {e}")
                 error_count += 1
+                continue
+
+            # Check if already has the target date (within 1 second tolerance)
+            if abs(current_mtime_ts - timestamp) < 1.0:
+                skipped_count += 1
+                continue
+
+            # Only build a datetime for files that are reported
+            current_mtime = datetime.fromtimestamp(current_mtime_ts)
+
+            # Update the date (dry runs have no pool)
+            if pool is None:
+                buf.append(f"[DRY RUN] {filename}")
+                buf.append(f"  Current:  {current_mtime.strftime('%Y-%m-%d %H:%M:%S')}")
+                buf.append(f"  New:      {target_str}")
+                updated_count += 1
+                if len(buf) >= _OUTPUT_BATCH_LINES:
+                    flush_output()
+            else:
+                future = pool.submit(os.utime, file_path, (timestamp, timestamp))
+                pending.append((future, filename, current_mtime))
+                report_updates(_MAX_PENDING_UPDATES)
+
+        report_updates(0)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    flush_output()
+
+    if found_count == 0:
+        print("No media files found in the specified folder.")
+        return
 
     # Summary
     print(f"\n{'='*60}")
+    print(f"Media files found: {found_count}")
     print(f"Files updated: {updated_count}")
     print(f"Files skipped (already correct): {skipped_count}")
     if error_count > 0:
@@ -5,13 +5,6 @@ import os
 import sys
 
 from __init__ import __version__
-from organize import organize
-from flatten import flatten_folder
-from count import display_count
-from dedupe import dedupe
-from fix_dates import fix_dates
-from health_check import health_check
-from assign_date import assign_date
 
 
 def create_parser() -> argparse.ArgumentParser:
@@ -61,6 +54,11 @@ def create_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="Run in batch mode without prompting for actions",
     )
+    organize_parser.add_argument(
+        "--file-dates",
+        metavar="PATH",
+        help="JSON file mapping file paths to known ISO dates, used instead of EXIF",
+    )
 
     # Flatten command
     flatten_parser = subparsers.add_parser(
@@ -109,6 +107,11 @@ def create_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="Show what would be done without making changes",
     )
+    dedupe_parser.add_argument(
+        "--legacy-md5",
+        action="store_true",
+        help="Hash file content with MD5 instead of BLAKE2b",
+    )
 
     # Fix-dates command
     fix_dates_parser = subparsers.add_parser(
@@ -186,10 +189,18 @@ def main() -> None:
         parser.print_help()
         sys.exit(1)
 
+    # Command modules are imported on demand so --help, --version and light
+    # commands like count don't pay for loading Pillow/ExifRead
     try:
         if args.command == "organize":
+            from organize import organize
+
             # Run preparatory commands if --all flag is set
             if args.all:
+                from dedupe import dedupe
+                from fix_dates import fix_dates
+                from health_check import health_check
+
                 print("=" * 60)
                 print("Running preparatory commands (--all flag)...")
                 print("=" * 60)
@@ -228,9 +239,12 @@ def main() -> None:
                 video_dest=args.video_dest,
                 dry_run=args.dry_run,
                 interactive=(not args.no_interactive),
+                file_dates=args.file_dates,
             )
 
         elif args.command == "flatten":
+            from flatten import flatten_folder
+
             target = (
                 args.target if args.target else os.path.join(args.source, "flattened")
             )
@@ -241,21 +255,30 @@ def main() -> None:
             )
 
         elif args.command == "count":
+            from count import display_count
+
             display_count(root=args.root)
 
         elif args.command == "dedupe":
+            from dedupe import dedupe
+
             dedupe(
                 root=args.root,
                 dry_run=args.dry_run,
+                legacy_md5=args.legacy_md5,
             )
 
         elif args.command == "fix-dates":
+            from fix_dates import fix_dates
+
             fix_dates(
                 root=args.root,
                 dry_run=args.dry_run,
             )
 
         elif args.command == "health-check":
+            from health_check import health_check
+
             health_check(
                 root=args.root,
                 dry_run=args.dry_run,
@@ -264,6 +287,8 @@ def main() -> None:
             )
 
         elif args.command == "assign-date":
+            from assign_date import assign_date
+
             assign_date(
                 source=args.source,
                 date_str=args.date,
@@ -1,28 +1,98 @@
 """Shared constants for media management."""
 
+import os
 import sys
-from typing import Dict, Set
+from datetime import datetime
+from typing import Dict, FrozenSet, Optional
 from dataclasses import dataclass
 from typing import TypeAlias
 
 # File extension sets
-PHOTO_EXT: Set[str] = {
-    ".jpg",
-    ".jpeg",
-    ".png",
-    ".heic",
-    ".tif",
-    ".tiff",
-    ".nef",
-    ".cr2",
-    ".arw",
-}
+PHOTO_EXT: FrozenSet[str] = frozenset(
+    {
+        ".jpg",
+        ".jpeg",
+        ".png",
+        ".heic",
+        ".tif",
+        ".tiff",
+        ".nef",
+        ".cr2",
+        ".arw",
+    }
+)
+
+VIDEO_EXT: FrozenSet[str] = frozenset({".mp4", ".mov", ".avi", ".mkv", ".mts"})
+
+# All photo and video extensions, for single-probe "is media" tests
+MEDIA_EXT: FrozenSet[str] = PHOTO_EXT | VIDEO_EXT
+
+# Camera RAW photo formats (a subset of PHOTO_EXT) that Pillow can't decode
+RAW_EXT: FrozenSet[str] = frozenset({".nef", ".cr2", ".arw"})
+
+# File classes returned by classify(); OTHER is falsy so callers can
+# skip non-media files with a plain truth test
+OTHER, PHOTO, VIDEO = 0, 1, 2
 
-VIDEO_EXT: Set[str] = {".mp4", ".mov", ".avi", ".mkv", ".mts"}
+# Every known extension mapped to its file class
+EXT_CLASS: Dict[str, int] = {
+    **{ext: PHOTO for ext in PHOTO_EXT},
+    **{ext: VIDEO for ext in VIDEO_EXT},
+}
 
 Year: TypeAlias = int
 
 
+def file_ext(filename: str) -> str:
+    """
+    Return the lowercased extension of a file name (e.g. ".jpg"), or "".
+
+    Only the suffix is lowercased, so long camera file names are not copied.
+    """
+    dot = filename.rfind(".")
+    return filename[dot:].lower() if dot >= 0 else ""
+
+
+def ext_class(ext: str) -> int:
+    """Classify a lowercased extension (e.g. ".jpg") as PHOTO, VIDEO, or OTHER."""
+    return EXT_CLASS.get(ext, OTHER)
+
+
+def classify(filename: str) -> int:
+    """Classify a file name as PHOTO, VIDEO, or OTHER by its extension."""
+    return ext_class(file_ext(filename))
+
+
+def parse_exif_datetime(value: object) -> Optional[datetime]:
+    """
+    Parse an EXIF "YYYY:MM:DD HH:MM:SS" value, ignoring any zone suffix.
+
+    The fields sit at fixed offsets, so they are sliced out directly rather
+    than matched by datetime.strptime's much slower format parser. Raw
+    ASCII bytes are accepted too, since int() parses them without decoding.
+
+    Returns:
+        The date, or None if value isn't a valid EXIF date string
+    """
+    if not isinstance(value, (str, bytes)) or len(value) < 19:
+        return None
+    try:
+        return datetime(
+            int(value[:4]),
+            int(value[5:7]),
+            int(value[8:10]),
+            int(value[11:13]),
+            int(value[14:16]),
+            int(value[17:19]),
+        )
+    except ValueError:
+        return None
+
+
+# Worker threads for syscall-bound work; sized for I/O concurrency, not CPU
+IO_WORKERS: int = min(32, (os.cpu_count() or 1) * 4)
+
+
 @dataclass(frozen=True)
 class ThresholdConfig:
     """Configuration for file size and resolution thresholds."""
@@ -1,85 +1,172 @@
 """Analyze and display folder statistics in a tree view."""
 
 import os
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict
-from dataclasses import dataclass
+from typing import Dict, List, Tuple
+from dataclasses import dataclass, field
 
-from constants import PHOTO_EXT, VIDEO_EXT
+from constants import OTHER, PHOTO, VIDEO, classify
 
+# Below this many top-level subfolders, process start-up outweighs the gain
+PARALLEL_MIN_SUBFOLDERS = 4
 
-@dataclass
-class Stats:
-    """Statistics for photo, video, and other file counts."""
 
-    Photo: int = 0
-    Video: int = 0
-    Other: int = 0
-
-    def __iadd__(self, other: "Stats") -> "Stats":
-        self.Photo += other.Photo
-        self.Video += other.Video
-        self.Other += other.Other
-        return self
+@dataclass(slots=True)
+class FolderStats:
+    """
+    Aggregated photo, video, and other file counts for a folder tree.
 
+    Counts are kept in parallel lists indexed by folder id rather than one
+    object per folder, so aggregating a child into its parent is plain
+    integer arithmetic on list slots.
+    """
 
-def get_folder_stats(root_path: Path) -> Dict[Path, Stats]:
+    paths: List[str] = field(default_factory=list)
+    photo: List[int] = field(default_factory=list)
+    video: List[int] = field(default_factory=list)
+    other: List[int] = field(default_factory=list)
+    # Ids of each folder's visible subfolders, in sorted order
+    children: List[List[int]] = field(default_factory=list)
+    id_of: Dict[str, int] = field(default_factory=dict)
+
+    def add_folder(
+        self, path: str, photo: int, video: int, other: int, children: List[int]
+    ) -> int:
+        """Append a folder and return its id."""
+        folder_id = len(self.paths)
+        self.paths.append(path)
+        self.photo.append(photo)
+        self.video.append(video)
+        self.other.append(other)
+        self.children.append(children)
+        self.id_of[path] = folder_id
+        return folder_id
+
+    def merge(self, other: "FolderStats") -> None:
+        """Append every folder of another tree, renumbering its ids."""
+        offset = len(self.paths)
+        self.paths.extend(other.paths)
+        self.photo.extend(other.photo)
+        self.video.extend(other.video)
+        self.other.extend(other.other)
+        self.children.extend([[c + offset for c in ids] for ids in other.children])
+        self.id_of.update({path: i + offset for path, i in other.id_of.items()})
+
+
+def _list_dir(path: str) -> Tuple[List[str], List[str]]:
+    """Return (visible subfolder names, visible file names) for a single folder."""
+    dirs: List[str] = []
+    files: List[str] = []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.name.startswith("."):
+                    continue
+                if entry.is_dir():
+                    # Like os.walk, list but never follow symlinked folders
+                    if not entry.is_symlink():
+                        dirs.append(entry.name)
+                else:
+                    files.append(entry.name)
+    except OSError:
+        pass
+    return dirs, files
+
+
+def _count_files(files: List[str]) -> Tuple[int, int, int]:
+    """Count the (photo, video, other) files among a folder's file names."""
+    # Counter tallies the mapped classes in C, with no Python-level loop
+    counts = Counter(map(classify, files))
+    return counts[PHOTO], counts[VIDEO], counts[OTHER]
+
+
+def get_folder_stats(root_path: str) -> FolderStats:
     """
     Recursively counts photo, video, and other files in folders and
     aggregates totals for parent folders.
-    Returns a dictionary mapping folder paths to Stats.
+    Returns the FolderStats for every visible folder under root_path.
     """
-    stats: Dict[Path, Stats] = {}
-
-    # Walk bottom-up so children are processed before parents
-    for root, dirs, files in os.walk(root_path, topdown=False):
-        current_path: Path = Path(root)
-        current_stats: Stats = Stats()
-
-        # Count files in the immediate folder
-        for filename in files:
-            if filename.startswith("."):
-                continue
-
-            ext: str = Path(filename).suffix.lower()
-
-            if ext in PHOTO_EXT:
-                current_stats.Photo += 1
-            elif ext in VIDEO_EXT:
-                current_stats.Video += 1
-            else:
-                current_stats.Other += 1
-
-        # Add stats from subdirectories
-        for d in dirs:
-            child_path: Path = current_path / d
-            if child_path in stats:
-                current_stats += stats[child_path]
-
-        stats[current_path] = current_stats
-
-    return stats
-
-
-def print_tree(path: Path, stats: Dict[Path, Stats], prefix: str = "") -> None:
+    tree = FolderStats()
+    photo, video, other = tree.photo, tree.video, tree.other
+    parent: List[int] = []
+
+    # Single top-down pass, pruning hidden folders (.git, .Trash, ...) so
+    # their contents are never read; each folder records its parent's id
+    stack: List[Tuple[str, int]] = [(root_path, -1)]
+    while stack:
+        path, parent_id = stack.pop()
+        dirs, files = _list_dir(path)
+        folder_id = tree.add_folder(path, *_count_files(files), [])
+        parent.append(parent_id)
+        if parent_id >= 0:
+            tree.children[parent_id].append(folder_id)
+
+        # Push in reverse so subfolders get ids (and print) in sorted order
+        for d in sorted(dirs, reverse=True):
+            stack.append((os.path.join(path, d), folder_id))
+
+    # Ids are assigned parents first, so sweeping them in reverse adds each
+    # folder's totals into its parent after all of its subfolders are in
+    for i in range(len(parent) - 1, 0, -1):
+        p = parent[i]
+        photo[p] += photo[i]
+        video[p] += video[i]
+        other[p] += other[i]
+
+    return tree
+
+
+def get_folder_stats_parallel(root_path: str) -> FolderStats:
+    """
+    Same as get_folder_stats, but walks each top-level subfolder in a
+    separate worker process and merges the results.
+    Falls back to a single process when there are only a few subfolders.
+    """
+    dirs, files = _list_dir(root_path)
+    if len(dirs) < PARALLEL_MIN_SUBFOLDERS:
+        return get_folder_stats(root_path)
+
+    child_paths = [os.path.join(root_path, d) for d in sorted(dirs)]
+    tree = FolderStats()
+    p, v, o = _count_files(files)
+    subdirs: List[int] = []
+
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as pool:
+        for child_path, child_tree in zip(
+            child_paths, pool.map(get_folder_stats, child_paths)
+        ):
+            tree.merge(child_tree)
+            child_id = tree.id_of[child_path]
+            p += tree.photo[child_id]
+            v += tree.video[child_id]
+            o += tree.other[child_id]
+            subdirs.append(child_id)
+
+    tree.add_folder(root_path, p, v, o, subdirs)
+    return tree
+
+
+def build_tree(path: str, tree: FolderStats, out: List[str]) -> None:
     """
-    Prints a visual tree structure of the folders with their aggregated file counts.
+    Appends the lines of a visual tree structure of the folders with their
+    aggregated file counts to out.
     """
-    counts = stats.get(path, Stats())
-    # Highlight the folder name and its count
-    print(
-        f"{prefix}└── {path.name}/ (Photos: {counts.Photo}, Videos: {counts.Video}, Other: {counts.Other})"
-    )
-
-    # Get immediate subdirectories
-    subdirs = sorted(
-        [d for d in path.iterdir() if d.is_dir() and not d.name.startswith(".")]
-    )
-
-    for i, subdir in enumerate(subdirs):
-        # Adjust indentation for the tree visual
+    # Walk iteratively so deep trees cannot hit the recursion limit
+    stack: List[Tuple[int, str]] = [(tree.id_of[path], "")]
+    while stack:
+        folder_id, prefix = stack.pop()
+        # Highlight the folder name and its count
+        out.append(
+            f"{prefix}└── {os.path.basename(tree.paths[folder_id])}/ (Photos: {tree.photo[folder_id]}, Videos: {tree.video[folder_id]}, Other: {tree.other[folder_id]})"
+        )
+
+        # Push in reverse so subdirectories print in sorted order
         new_prefix = prefix + "    "
-        print_tree(subdir, stats, new_prefix)
+        for child_id in reversed(tree.children[folder_id]):
+            stack.append((child_id, new_prefix))
 
 
 def display_count(root: str) -> None:
@@ -98,6 +185,9 @@ def display_count(root: str) -> None:
     print(f"\nScanning: {root_path}")
     print("-" * 40)
 
-    folder_stats = get_folder_stats(root_path)
-    print_tree(root_path, folder_stats)
+    folder_stats = get_folder_stats_parallel(str(root_path))
+    # Emit the whole tree with a single write instead of a print per folder
+    tree_lines: List[str] = []
+    build_tree(str(root_path), folder_stats, tree_lines)
+    sys.stdout.write("\n".join(tree_lines) + "\n")
     print("-" * 40)
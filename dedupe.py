@@ -1,58 +1,205 @@
 """Find and remove duplicate files based on content hash."""
 
 import hashlib
+import mmap
 import os
+import sys
 from collections import defaultdict
-from typing import Dict, List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 
+from constants import IO_WORKERS
+from walk import scan_tree
 
-def compute_hash(file_path: str) -> str:
-    """Compute MD5 hash of a file."""
-    hash_md5 = hashlib.md5()
+# Size of the read buffer used for files that can't be memory-mapped
+HASH_CHUNK_SIZE = 4 * 1024 * 1024
+
+# Leading bytes hashed to split same-size buckets before full hashing
+QUICK_HASH_BYTES = 64 * 1024
+
+# Files up to this size are fully hashed straight away, since reading the
+# leading block first would save little
+QUICK_HASH_MIN_SIZE = 128 * 1024
+
+# Content hash used to identify duplicates. Dedupe only needs protection
+# against accidental collisions, so the faster BLAKE2b replaces MD5, which
+# remains available for comparing against earlier runs.
+HASH_ALGORITHM = "blake2b"
+LEGACY_HASH_ALGORITHM = "md5"
+
+
+def hash_file(
+    file_path: str,
+    buffer: Optional[memoryview] = None,
+    algorithm: str = HASH_ALGORITHM,
+) -> str:
+    """
+    Compute the content hash of a file, raising OSError if it can't be read.
+
+    The file is memory-mapped and hashed in one call, letting the kernel
+    handle readahead. Files that can't be mapped (empty or special files)
+    are read in chunks instead; if buffer is given, those chunks are read
+    into it rather than allocated per read.
+    """
+    file_hash = hashlib.new(algorithm)
+    with open(file_path, "rb", buffering=0) as f:
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                file_hash.update(mm)
+        except (ValueError, OSError):
+            if buffer is None:
+                buffer = memoryview(bytearray(HASH_CHUNK_SIZE))
+            while n := f.readinto(buffer):
+                file_hash.update(buffer[:n])
+    return file_hash.hexdigest()
+
+
+def compute_hash(
+    file_path: str,
+    buffer: Optional[memoryview] = None,
+    algorithm: str = HASH_ALGORITHM,
+) -> str:
+    """Compute the content hash of a file, or "" (with a warning) on error."""
     try:
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(8192), b""):
-                hash_md5.update(chunk)
-        return hash_md5.hexdigest()
+        return hash_file(file_path, buffer, algorithm)
     except Exception as e:
         print(f"  [!] Could not hash {os.path.basename(file_path)}: {e}")
         return ""
 
 
-def find_duplicates(root: str) -> Dict[str, List[str]]:
+def _hash_batch(file_paths: List[str], algorithm: str) -> Dict[str, str]:
+    """Hash a batch of files sequentially, sharing one read buffer."""
+    buffer = memoryview(bytearray(HASH_CHUNK_SIZE))
+    hashes: Dict[str, str] = {}
+    for file_path in file_paths:
+        file_hash = compute_hash(file_path, buffer, algorithm)
+        if file_hash:
+            hashes[file_path] = file_hash
+    return hashes
+
+
+def compute_hashes(
+    file_paths: List[str], algorithm: str = HASH_ALGORITHM
+) -> Dict[str, str]:
     """
-    Scan directory for duplicate files based on content hash.
+    Compute content hashes for many files on a thread pool.
+
+    hashlib releases the GIL while hashing and file reads release it while
+    waiting on the disk, so batches of files are hashed concurrently.
 
     Returns:
-        Dictionary mapping hash -> list of file paths with that hash
+        Dictionary mapping file path -> hash for every file that could be read
+    """
+    # Several small batches per worker keep the load balanced across sizes
+    batch_size = max(1, len(file_paths) // (IO_WORKERS * 4))
+    batches = [
+        file_paths[i : i + batch_size] for i in range(0, len(file_paths), batch_size)
+    ]
+
+    hashes: Dict[str, str] = {}
+    with ThreadPoolExecutor(max_workers=IO_WORKERS) as pool:
+        futures = [pool.submit(_hash_batch, batch, algorithm) for batch in batches]
+        # Merged in submission order so the result (and which duplicate
+        # find_duplicates lists first) doesn't depend on thread timing
+        for future in futures:
+            hashes.update(future.result())
+    return hashes
+
+
+def compute_quick_hash(file_path: str, algorithm: str = HASH_ALGORITHM) -> str:
+    """
+    Compute the hash of the first QUICK_HASH_BYTES of a file, mapping just
+    that block like compute_hash does for whole files.
     """
-    hash_map: Dict[str, List[str]] = defaultdict(list)
+    try:
+        with open(file_path, "rb", buffering=0) as f:
+            try:
+                with mmap.mmap(
+                    f.fileno(), QUICK_HASH_BYTES, access=mmap.ACCESS_READ
+                ) as mm:
+                    return hashlib.new(algorithm, mm).hexdigest()
+            except (ValueError, OSError):
+                # Shorter than the block (e.g. truncated since the scan)
+                return hashlib.new(algorithm, f.read(QUICK_HASH_BYTES)).hexdigest()
+    except Exception as e:
+        print(f"  [!] Could not hash {os.path.basename(file_path)}: {e}")
+        return ""
 
-    print(f"Scanning {root} for duplicates...\n")
-    for dirpath, _, filenames in os.walk(root):
-        print(f"Checking {len(filenames)} files in {dirpath}")
-        for filename in filenames:
 
-            if filename.startswith("."):
-                continue
+def find_duplicates(
+    root: str, algorithm: str = HASH_ALGORITHM
+) -> Dict[str, Tuple[int, List[str]]]:
+    """
+    Scan directory for duplicate files based on content hash.
 
-            file_path = os.path.join(dirpath, filename)
+    Files are bucketed by size first, since files of different sizes
+    can't be duplicates, so only files that share a size are ever read.
 
-            # Skip non-files (symlinks, etc.)
-            if not os.path.isfile(file_path):
+    Returns:
+        Dictionary mapping hash -> (file size, list of file paths with that hash)
+    """
+    size_map: Dict[int, List[str]] = defaultdict(list)
+
+    print(f"Scanning {root} for duplicates...\n")
+    for dirpath, entries in scan_tree(root):
+        print(f"Checking {len(entries)} files in {dirpath}")
+        for entry in entries:
+            try:
+                size_map[entry.stat().st_size].append(entry.path)
+            except OSError:
                 continue
 
-            file_hash = compute_hash(file_path)
-            if file_hash:
-                hash_map[file_hash].append(file_path)
+    # Only same-size files can match; for larger files, split each size
+    # bucket by a hash of the leading block before reading whole files, so
+    # most non-duplicate pairs are rejected after QUICK_HASH_BYTES each
+    # Candidates for full hashing: file path -> size
+    candidates: Dict[str, int] = {}
+    quick_sizes: List[int] = []
+    quick_paths: List[str] = []
+    for size, paths in size_map.items():
+        if len(paths) < 2:
+            continue
+        if size <= QUICK_HASH_MIN_SIZE:
+            candidates.update(dict.fromkeys(paths, size))
+        else:
+            quick_sizes.extend([size] * len(paths))
+            quick_paths.extend(paths)
+
+    # Issue the small leading-block reads concurrently so many requests are
+    # in flight at once instead of waiting on each file in turn
+    with ThreadPoolExecutor(max_workers=IO_WORKERS) as pool:
+        quick_hashes = pool.map(
+            compute_quick_hash, quick_paths, [algorithm] * len(quick_paths)
+        )
+        quick_map: Dict[Tuple[int, str], List[str]] = defaultdict(list)
+        for size, file_path, quick_hash in zip(quick_sizes, quick_paths, quick_hashes):
+            if quick_hash:
+                quick_map[(size, quick_hash)].append(file_path)
+
+    for (size, _), group in quick_map.items():
+        if len(group) > 1:
+            candidates.update(dict.fromkeys(group, size))
+
+    # Hash the remaining candidates as one batch, carrying the size from the
+    # scan so reporting doesn't need to stat the files again
+    hash_map: Dict[str, Tuple[int, List[str]]] = {}
+    for file_path, file_hash in compute_hashes(list(candidates), algorithm).items():
+        if file_hash in hash_map:
+            hash_map[file_hash][1].append(file_path)
+        else:
+            hash_map[file_hash] = (candidates[file_path], [file_path])
 
     # Filter to only duplicates (hash appears more than once)
-    duplicates = {h: paths for h, paths in hash_map.items() if len(paths) > 1}
+    duplicates = {h: group for h, group in hash_map.items() if len(group[1]) > 1}
 
     return duplicates
 
 
-def calculate_space_savings(duplicates: Dict[str, List[str]]) -> Tuple[int, int]:
+def calculate_space_savings(
+    duplicates: Dict[str, Tuple[int, List[str]]]
+) -> Tuple[int, int]:
     """
     Calculate potential space savings from removing duplicates.
 
@@ -62,16 +209,10 @@ def calculate_space_savings(duplicates: Dict[str, List[str]]) -> Tuple[int, int]
     duplicate_count = 0
     bytes_saved = 0
 
-    for paths in duplicates.values():
+    for file_size, paths in duplicates.values():
         # Keep one copy, remove the rest
         duplicate_count += len(paths) - 1
-
-        # All files have same size, so get size from first file
-        try:
-            file_size = os.path.getsize(paths[0])
-            bytes_saved += file_size * (len(paths) - 1)
-        except OSError:
-            pass
+        bytes_saved += file_size * (len(paths) - 1)
 
     return duplicate_count, bytes_saved
 
@@ -85,19 +226,21 @@ def format_size(bytes: int) -> str:
     return f"{bytes:.2f} PB"
 
 
-def dedupe(root: str, dry_run: bool = True) -> None:
+def dedupe(root: str, dry_run: bool = True, legacy_md5: bool = False) -> None:
     """
     Find and optionally remove duplicate files.
 
     Args:
         root: Root directory to scan
         dry_run: If True, only show what would be done
+        legacy_md5: If True, hash with MD5 instead of BLAKE2b
     """
     if not os.path.exists(root):
         print(f"Error: {root} is not accessible.")
         return
 
-    duplicates = find_duplicates(root)
+    algorithm = LEGACY_HASH_ALGORITHM if legacy_md5 else HASH_ALGORITHM
+    duplicates = find_duplicates(root, algorithm)
 
     if not duplicates:
         print("\nNo duplicates found!")
@@ -111,10 +254,11 @@ def dedupe(root: str, dry_run: bool = True) -> None:
     print(f"Space that could be saved: {format_size(bytes_saved)}")
     print(f"{'='*60}\n")
 
-    # Display duplicate sets
-    for idx, (file_hash, paths) in enumerate(duplicates.items(), 1):
-        file_size = os.path.getsize(paths[0])
-        print(
+    # Display duplicate sets, collected and written at once rather than a
+    # print() (and stdout lock) per line
+    out: List[str] = []
+    for idx, (file_hash, (file_size, paths)) in enumerate(duplicates.items(), 1):
+        out.append(
             f"\nDuplicate Set #{idx} (Hash: {file_hash[:8]}..., Size: {format_size(file_size)})"
         )
 
@@ -123,9 +267,10 @@ def dedupe(root: str, dry_run: bool = True) -> None:
 
         for i, path in enumerate(paths_sorted):
             if i == 0:
-                print(f"  [KEEP] {path}")
+                out.append(f"  [KEEP] {path}")
             else:
-                print(f"  [DELETE] {path}")
+                out.append(f"  [DELETE] {path}")
+    sys.stdout.write("\n".join(out) + "\n")
 
     # Delete duplicates if not dry run
     if not dry_run:
@@ -134,17 +279,19 @@ def dedupe(root: str, dry_run: bool = True) -> None:
         print(f"{'='*60}\n")
 
         deleted_count = 0
-        for paths in duplicates.values():
+        for _, paths in duplicates.values():
             # Keep shortest path, delete rest
             paths_sorted = sorted(paths, key=lambda p: len(p))
 
+            out = []
             for path in paths_sorted[1:]:
                 try:
                     os.remove(path)
-                    print(f"  Deleted: {path}")
+                    out.append(f"  Deleted: {path}")
                     deleted_count += 1
                 except Exception as e:
-                    print(f"  [!] Could not delete {path}: {e}")
+                    out.append(f"  [!] Could not delete {path}: {e}")
+            sys.stdout.write("\n".join(out) + "\n")
 
         print(f"\nDeleted {deleted_count} duplicate files")
         print(f"Freed {format_size(bytes_saved)}")
@@ -0,0 +1,105 @@
+"""Read photo dates in batches through a persistent exiftool process."""
+
+import json
+import shutil
+import subprocess
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from constants import parse_exif_datetime
+
+# Files sent to exiftool per round trip, bounding the size of each response
+BATCH_SIZE = 500
+
+
+def exiftool_available() -> bool:
+    """Check whether the exiftool binary is on PATH."""
+    return shutil.which("exiftool") is not None
+
+
+class ExifToolDaemon:
+    """
+    A long-running `exiftool -stay_open` process.
+
+    Paths are sent in batches over stdin and each batch is answered with one
+    JSON document, so hundreds of files are read per round trip instead of
+    one Python-level EXIF parse per file.
+
+    Usage:
+        with ExifToolDaemon() as exiftool:
+            dates = exiftool.get_dates(paths)
+    """
+
+    def __init__(self) -> None:
+        self.process: Optional[subprocess.Popen] = None
+        # One command at a time may be in flight on the shared pipes
+        self.lock = threading.Lock()
+
+    def __enter__(self) -> "ExifToolDaemon":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def start(self) -> None:
+        self.process = subprocess.Popen(
+            ["exiftool", "-stay_open", "True", "-@", "-"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding="utf-8",
+        )
+
+    def close(self) -> None:
+        """Ask exiftool to exit, killing it if it doesn't."""
+        if self.process is None:
+            return
+        process, self.process = self.process, None
+        try:
+            process.stdin.write("-stay_open\nFalse\n")
+            process.stdin.flush()
+            process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            process.kill()
+
+    def _execute(self, args: List[str]) -> str:
+        """Run one command and return its output, up to the {ready} marker."""
+        if self.process is None:
+            raise OSError("exiftool is not running")
+
+        self.process.stdin.write("\n".join(args) + "\n-execute\n")
+        self.process.stdin.flush()
+
+        lines: List[str] = []
+        while True:
+            line = self.process.stdout.readline()
+            if not line:
+                raise OSError("exiftool exited unexpectedly")
+            if line.rstrip() == "{ready}":
+                return "".join(lines)
+            lines.append(line)
+
+    def get_dates(self, paths: List[str]) -> List[Optional[datetime]]:
+        """
+        Get the EXIF DateTimeOriginal of each path, or None where it is
+        missing or unreadable.
+
+        Raises:
+            OSError: If the exiftool process fails
+        """
+        dates: Dict[str, Optional[datetime]] = {}
+        for i in range(0, len(paths), BATCH_SIZE):
+            batch = paths[i : i + BATCH_SIZE]
+            with self.lock:
+                output = self._execute(
+                    ["-json", "-fast", "-DateTimeOriginal", *batch]
+                )
+            # Nothing is printed when none of the files could be read
+            for item in json.loads(output) if output.strip() else []:
+                dates[item["SourceFile"]] = parse_exif_datetime(
+                    item.get("DateTimeOriginal")
+                )
+        return [dates.get(path) for path in paths]
@@ -2,20 +2,74 @@
 
 import os
 import re
+import sys
 from datetime import datetime
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
 import time
 from datetime import datetime
 
 import exifread
 
-from constants import PHOTO_EXT, VIDEO_EXT
+from constants import IO_WORKERS, PHOTO, classify, parse_exif_datetime
+from walk import scan_tree
+
+# Verbose diagnostics, e.g. MEDIA_JANITOR_DEBUG=1 media-janitor fix-dates ...
+_DEBUG = bool(os.environ.get("MEDIA_JANITOR_DEBUG"))
+
+# Filename date patterns, compiled once at import into a single alternation
+# so each filename is scanned once:
+# - Compact: IMG_YYYYMMDD_HHMMSS (prefix and time optional)
+# - Dashed:  YYYY-MM-DD
+_DATE_RE = re.compile(
+    r"(?:IMG|VID|DSC)?_?(?P<y1>\d{4})(?P<mo1>\d{2})(?P<d1>\d{2})"
+    r"(?:_(?P<h>\d{2})(?P<mi>\d{2})(?P<s>\d{2}))?"
+    r"|(?P<y2>\d{4})-(?P<mo2>\d{2})-(?P<d2>\d{2})"
+)
+
+# Camera prefixes handled by the fixed-width fast path
+_FAST_PREFIXES = ("IMG_", "VID_", "DSC_")
+
+
+def _is_ascii_digits(s: str) -> bool:
+    return s.isascii() and s.isdigit()
+
+
+def _extract_date_fast(filename: str) -> Optional[datetime]:
+    """
+    Parse the common fixed-width names (IMG_YYYYMMDD_HHMMSS, YYYYMMDD_HHMMSS,
+    YYYYMMDD...) by slicing. Returns None when the name doesn't start that
+    way or the date is invalid, leaving it to the regex.
+    """
+    start = 4 if filename.startswith(_FAST_PREFIXES) else 0
+    digits = filename[start : start + 8]
+    if len(digits) != 8 or not _is_ascii_digits(digits):
+        return None
+
+    hour = minute = second = 0
+    clock = filename[start + 9 : start + 15]
+    if (
+        filename[start + 8 : start + 9] == "_"
+        and len(clock) == 6
+        and _is_ascii_digits(clock)
+    ):
+        hour, minute, second = int(clock[:2]), int(clock[2:4]), int(clock[4:])
+
+    try:
+        return datetime(
+            int(digits[:4]), int(digits[4:6]), int(digits[6:]), hour, minute, second
+        )
+    except ValueError:
+        return None
 
 
 def extract_date_from_exif(file_path: str) -> Optional[datetime]:
     try:
         with open(file_path, "rb") as f:
-            tags = exifread.process_file(f, details=False)
+            # OffsetTimeOriginal follows DateTimeOriginal in the EXIF IFD
+            tags = exifread.process_file(
+                f, stop_tag="EXIF OffsetTimeOriginal", details=False
+            )
             date_tag = tags.get("EXIF DateTimeOriginal")
             offset_tag = tags.get("EXIF OffsetTimeOriginal")  # e.g. "-08:00"
 
@@ -23,10 +77,12 @@ def extract_date_from_exif(file_path: str) -> Optional[datetime]:
                 return None
 
             # 1. Get the "Naive" time (the Wall Clock time)
-            dt_naive = datetime.strptime(str(date_tag), "%Y:%m:%d %H:%M:%S")
+            dt_naive = parse_exif_datetime(date_tag.values)
+            if dt_naive is None:
+                return None
 
-            # 2. Validation Logic (Optional)
-            if offset_tag:
+            # 2. Validation Logic (Optional, debug output only)
+            if offset_tag and _DEBUG:
                 # Convert system timezone offset to a string for comparison
                 # e.g., -28800 seconds -> "-08:00"
                 system_offset_sec = (
@@ -57,33 +113,50 @@ def extract_date_from_filename(filename: str) -> Optional[datetime]:
     - 20220105_143022.jpg
     - Screenshot 2022-01-05 at 14.30.22.png
     """
-    # Pattern 1: IMG_YYYYMMDD_HHMMSS
-    pattern1 = r"(?:IMG|VID|DSC)?_?(\d{4})(\d{2})(\d{2})(?:_(\d{2})(\d{2})(\d{2}))?"
-    match = re.search(pattern1, filename)
-    if match:
-        year, month, day = int(match.group(1)), int(match.group(2)), int(match.group(3))
-        hour = int(match.group(4)) if match.group(4) else 0
-        minute = int(match.group(5)) if match.group(5) else 0
-        second = int(match.group(6)) if match.group(6) else 0
+    # Most camera names start with the date, so slice those directly and
+    # only run the regex scan for everything else
+    fast_date = _extract_date_fast(filename)
+    if fast_date:
+        return fast_date
+
+    # The first compact match takes priority over any dashed match
+    dashed: Optional[re.Match] = None
+    compact_seen = False
+    for match in _DATE_RE.finditer(filename):
+        if match.group("y1") is not None:
+            if compact_seen:
+                continue
+            compact_seen = True
+            hour = int(match.group("h")) if match.group("h") else 0
+            minute = int(match.group("mi")) if match.group("mi") else 0
+            second = int(match.group("s")) if match.group("s") else 0
+            try:
+                return datetime(
+                    int(match.group("y1")),
+                    int(match.group("mo1")),
+                    int(match.group("d1")),
+                    hour,
+                    minute,
+                    second,
+                )
+            except ValueError:
+                pass
+        elif dashed is None:
+            dashed = match
 
-        try:
-            return datetime(year, month, day, hour, minute, second)
-        except ValueError:
-            pass
+        if compact_seen and dashed is not None:
+            break
 
-    # Pattern 2: YYYY-MM-DD
-    pattern2 = r"(\d{4})-(\d{2})-(\d{2})"
-    match = re.search(pattern2, filename)
-    if match:
-        year, month, day = int(match.group(1)), int(match.group(2)), int(match.group(3))
+    if dashed:
         try:
-            return datetime(year, month, day)
+            return datetime(
+                int(dashed.group("y2")), int(dashed.group("mo2")), int(dashed.group("d2"))
+            )
         except ValueError:
             pass
 
     return None
 
-
 def get_correct_date(file_path: str) -> Optional[datetime]:
     """
     Get the correct date for a file, trying multiple sources in priority order.
@@ -94,10 +167,9 @@ def get_correct_date(file_path: str) -> Optional[datetime]:
     3. None if neither works
     """
     filename = os.path.basename(file_path)
-    ext = os.path.splitext(filename.lower())[1]
 
     # Try EXIF for photo files
-    if ext in PHOTO_EXT:
+    if classify(filename) == PHOTO:
         exif_date = extract_date_from_exif(file_path)
         if exif_date:
             return exif_date
@@ -128,53 +200,72 @@ def fix_dates(root: str, dry_run: bool = True) -> None:
     skipped_count = 0
     error_count = 0
 
-    for dirpath, _, filenames in os.walk(root):
-        print(f"Checking {len(filenames)} files in {dirpath}")
-        for filename in filenames:
-            if filename.startswith("."):
-                continue
-
-            file_path = os.path.join(dirpath, filename)
-            ext = os.path.splitext(filename.lower())[1]
-
-            # Only process media files
-            if ext not in PHOTO_EXT and ext not in VIDEO_EXT:
-                continue
-
-            # Get current modification time
-            current_mtime = datetime.fromtimestamp(os.path.getmtime(file_path))
-
-            # Get correct date
-            correct_date = get_correct_date(file_path)
-
-            if correct_date is None:
-                skipped_count += 1
-                continue
-
-            # Check if date needs fixing (allow 1 second tolerance for rounding)
-            time_diff = abs((correct_date - current_mtime).total_seconds())
-            if time_diff < 1:
-                continue
-
-            # Fix the date
-            if dry_run:
-                print(f"[DRY RUN] {filename}")
-                print(f"  Current:  {current_mtime.strftime('%Y-%m-%d %H:%M:%S')}")
-                print(f"  Correct:  {correct_date.strftime('%Y-%m-%d %H:%M:%S')}")
-                fixed_count += 1
-            else:
-                try:
-                    # Set access and modification times
-                    timestamp = correct_date.timestamp()
-                    os.utime(file_path, (timestamp, timestamp))
-                    print(f"Fixed: {filename}")
-                    print(
-                        f"  {current_mtime.strftime('%Y-%m-%d %H:%M:%S')} -> {correct_date.strftime('%Y-%m-%d %H:%M:%S')}"
-                    )
+    # Date lookups (EXIF parsing) run on worker threads; files are updated and
+    # reported on the main thread so the log stays in order
+    with ThreadPoolExecutor(max_workers=IO_WORKERS) as pool:
+        for dirpath, entries in scan_tree(root):
+            # Each folder's report is written in one go rather than a print()
+            # (and stdout lock) per line
+            out: List[str] = [f"Checking {len(entries)} files in {dirpath}"]
+            media_entries: List[Tuple[os.DirEntry, datetime]] = []
+            for entry in entries:
+                # Only process media files
+                if not classify(entry.name):
+                    continue
+
+                # Get current modification time
+                current_mtime = datetime.fromtimestamp(entry.stat().st_mtime)
+
+                # A filename date that already matches the modification time
+                # means the file is correct, so skip opening it for EXIF
+                filename_date = extract_date_from_filename(entry.name)
+                if (
+                    filename_date
+                    and abs((filename_date - current_mtime).total_seconds()) < 1
+                ):
+                    continue
+
+                media_entries.append((entry, current_mtime))
+
+            correct_dates = pool.map(
+                get_correct_date, [entry.path for entry, _ in media_entries]
+            )
+            for (entry, current_mtime), correct_date in zip(
+                media_entries, correct_dates
+            ):
+                filename = entry.name
+                file_path = entry.path
+
+                if correct_date is None:
+                    skipped_count += 1
+                    continue
+
+                # Check if date needs fixing (allow 1 second tolerance for rounding)
+                time_diff = abs((correct_date - current_mtime).total_seconds())
+                if time_diff < 1:
+                    continue
+
+                # Fix the date
+                if dry_run:
+                    out.append(f"[DRY RUN] {filename}")
+                    out.append(f"  Current:  {current_mtime.strftime('%Y-%m-%d %H:%M:%S')}")
+                    out.append(f"  Correct:  {correct_date.strftime('%Y-%m-%d %H:%M:%S')}")
                     fixed_count += 1
-                except Exception as e:
-                    print(f"  [!] Could not fix {filename}: {e}")
-                    error_count += 1
+                else:
+                    try:
+                        # Set access and modification times
+                        timestamp = correct_date.timestamp()
+                        os.utime(file_path, (timestamp, timestamp))
+                        out.append(f"Fixed: {filename}")
+                        out.append(
+                            f"  {current_mtime.strftime('%Y-%m-%d %H:%M:%S')} -> {correct_date.strftime('%Y-%m-%d %H:%M:%S')}"
+                        )
+                        fixed_count += 1
+                    except Exception as e:
+                        out.append(f"  [!] Could not fix {filename}: {e}")
+                        error_count += 1
+
+            sys.stdout.write("\n".join(out) + "\n")
 
     # Summary
     print(f"\n{'='*60}")
@@ -1,8 +1,41 @@
 """Flatten nested folder structures into a single directory."""
 
 import os
-import shutil
-from typing import Optional, Set, Dict, Tuple
+import sys
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from constants import file_ext
+from dedupe import compute_hashes
+from fsutil import move_file
+from walk import scan_tree
+
+# Number of buffered output lines written to stdout at a time
+_OUTPUT_BATCH_LINES = 1000
+
+
+def _unique_name(filename: str, reserved: Set[str]) -> str:
+    """Return the first "name_N.ext" variant of filename not in reserved."""
+    stem, ext = os.path.splitext(filename)
+    n = 1
+    while f"{stem}_{n}{ext}" in reserved:
+        n += 1
+    return f"{stem}_{n}{ext}"
+
+
+def _group_by_content(
+    files: List[Tuple[str, int]], hashes: Dict[str, str]
+) -> List[List[str]]:
+    """
+    Split (path, size) pairs for same-named files into groups of identical
+    content. Files of different sizes always differ; same-size files are
+    compared by content hash, and a file that couldn't be hashed is kept in
+    a group of its own.
+    """
+    groups: Dict[Tuple[int, str], List[str]] = defaultdict(list)
+    for path, size in files:
+        groups[(size, hashes.get(path, path))].append(path)
+    return list(groups.values())
 
 
 def flatten_folder(
@@ -10,7 +43,11 @@ def flatten_folder(
 ) -> None:
     """
     Flatten all files from the source folder (recursively) into the target folder.
-    Keeps the largest file in case of duplicates (by filename).
+
+    Files that share a name are compared by content: identical copies are
+    removed, keeping the one already in the target folder (or the one with
+    the shortest path), and files with different content are kept under
+    unique names (e.g. "IMG_0001_1.jpg").
 
     Args:
         source: Source folder to flatten
@@ -20,43 +57,84 @@ def flatten_folder(
     """
     os.makedirs(target, exist_ok=True)
 
-    # Keep track of files we've already moved: filename -> (full_path, size)
-    seen: Dict[str, Tuple[str, int]] = {}
+    # Files already in the target folder stay put: filename -> (path, size)
+    placed: Dict[str, Tuple[str, int]] = {}
+    with os.scandir(target) as it:
+        for entry in it:
+            if entry.is_file() and not entry.name.startswith("."):
+                placed[entry.name] = (entry.path, entry.stat().st_size)
+
+    # Files to move, grouped by name: filename -> [(path, size)]
+    incoming: Dict[str, List[Tuple[str, int]]] = defaultdict(list)
+    target_abs = os.path.abspath(target)
+    for root, entries in scan_tree(source):
+        # Skip files already in the target folder, once per folder
+        if os.path.abspath(root) == target_abs:
+            continue
 
-    for root, _, files in os.walk(source):
-        for file in files:
-            ext: str = os.path.splitext(file)[1].lower()
-            if extensions and ext not in extensions:
+        for entry in entries:
+            file: str = entry.name
+            if extensions and file_ext(file) not in extensions:
                 continue
 
-            src_path: str = os.path.join(root, file)
-            size: int = os.path.getsize(src_path)
+            incoming[file].append((entry.path, entry.stat().st_size))
 
-            # Skip files already in the target folder
-            if os.path.abspath(root) == os.path.abspath(target):
-                continue
+    # Only same-named files of equal size can be copies of each other, so
+    # only those are read, all hashed together on dedupe's thread pool
+    to_hash: List[str] = []
+    for file, files in incoming.items():
+        if file in placed:
+            files = [placed[file]] + files
+        if len(files) < 2:
+            continue
+        size_counts: Dict[int, int] = defaultdict(int)
+        for _, size in files:
+            size_counts[size] += 1
+        to_hash.extend(path for path, size in files if size_counts[size] > 1)
+    hashes = compute_hashes(to_hash) if to_hash else {}
+
+    # Names in use in the target folder, and every name that may still be
+    # claimed, so a renamed file never takes another file's name
+    taken: Set[str] = set(placed)
+    reserved: Set[str] = taken | set(incoming)
 
-            prefix = "[Dry Run] " if dry_run else ""
-            if file in seen:
-                existing_path, existing_size = seen[file]
+    prefix = "[Dry Run] " if dry_run else ""
+    out: List[str] = []
+    for file, files in incoming.items():
+        placed_path = placed[file][0] if file in placed else None
+        members = [placed[file]] + files if file in placed else files
 
-                if size > existing_size:
-                    print(
-                        f"{prefix}Replace (keep bigger): {existing_path} -> {src_path}"
+        for group in _group_by_content(members, hashes):
+            # Keep the copy already in the target, else the shortest path
+            keep = placed_path if placed_path in group else min(group, key=len)
+            for path in group:
+                if path != keep:
+                    out.append(
+                        f"{prefix}Remove identical duplicate: {path} (keeping {keep})"
                     )
                     if not dry_run:
-                        os.remove(existing_path)
-                        shutil.move(src_path, os.path.join(target, file))
-                        seen[file] = (os.path.join(target, file), size)
-                else:
-                    print(f"{prefix}Skip smaller duplicate: {src_path}")
-                    if not dry_run:
-                        os.remove(src_path)
+                        os.remove(path)
+
+            if keep == placed_path:
+                continue
+
+            if file in taken:
+                dest_name = _unique_name(file, reserved)
+                reserved.add(dest_name)
             else:
-                dest_path: str = os.path.join(target, file)
-                print(f"{prefix}Move: {src_path} -> {dest_path}")
-                if not dry_run:
-                    shutil.move(src_path, dest_path)
-                seen[file] = (dest_path, size)
+                dest_name = file
+            taken.add(dest_name)
+
+            dest_path: str = os.path.join(target, dest_name)
+            out.append(f"{prefix}Move: {keep} -> {dest_path}")
+            if not dry_run:
+                move_file(keep, dest_path)
+
+        if len(out) >= _OUTPUT_BATCH_LINES:
+            sys.stdout.write("\n".join(out) + "\n")
+            out.clear()
+
+    if out:
+        sys.stdout.write("\n".join(out) + "\n")
 
     print("Flattening complete.")
@@ -0,0 +1,24 @@
+"""File system helpers shared by the commands that move files."""
+
+import errno
+import os
+import shutil
+
+
+def move_file(src: str, dest_path: str) -> None:
+    """
+    Move a file to dest_path, replacing any file there; callers check for
+    collisions first.
+
+    Within one volume this is a single rename, skipping shutil.move's
+    destination checks; across volumes the file is copied with shutil.copy2
+    (the kernel's sendfile/fcopyfile copy, keeping modification times) and
+    the original removed.
+    """
+    try:
+        os.replace(src, dest_path)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.copy2(src, dest_path)
+        os.unlink(src)
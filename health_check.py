@@ -3,19 +3,32 @@
 import sys
 import os
 import subprocess
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import List, Optional, Tuple, Dict
 from PIL import Image
 import exifread
 
 from constants import (
-    PHOTO_EXT,
+    IO_WORKERS,
+    PHOTO,
     PHOTO_THRESHOLDS,
-    VIDEO_EXT,
+    RAW_EXT,
     VIDEO_THRESHOLDS,
     ThresholdConfig,
     Year,
+    classify,
+    ext_class,
+    file_ext,
+    parse_exif_datetime,
 )
+from walk import scan_tree
+
+
+# Era boundary years of each threshold table, sorted once for bisection
+_PHOTO_BOUNDARIES: List[Year] = sorted(PHOTO_THRESHOLDS)
+_VIDEO_BOUNDARIES: List[Year] = sorted(VIDEO_THRESHOLDS)
 
 
 def format_threshold(thresholds: Dict[Year, ThresholdConfig]) -> str:
@@ -43,29 +56,60 @@ def print_thresholds() -> None:
     print(format_threshold(VIDEO_THRESHOLDS))
 
 
-def get_file_date(file_path: str) -> Optional[datetime]:
-    """Get the original date of a media file from EXIF or file modification time."""
-    ext = os.path.splitext(file_path.lower())[1]
+def scan_photo_meta(
+    file_path: str,
+) -> Tuple[Optional[datetime], Optional[int], Optional[int]]:
+    """
+    Read a photo's EXIF capture date and dimensions in a single pass.
 
-    # Try EXIF for photos
-    if ext in PHOTO_EXT:
+    Returns:
+        Tuple of (date, width, height), with None for any missing tag
+    """
+    date: Optional[datetime] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    try:
+        with open(file_path, "rb") as f:
+            # ExifImageLength follows DateTimeOriginal in the EXIF IFD, so
+            # stopping there still picks up all three tags
+            tags = exifread.process_file(
+                f, stop_tag="EXIF ExifImageLength", details=False
+            )
+    except Exception:
+        return date, width, height
+
+    date_tag = tags.get("EXIF DateTimeOriginal")
+    if date_tag:
+        date = parse_exif_datetime(date_tag.values)
+
+    width_tag = tags.get("EXIF ExifImageWidth")
+    height_tag = tags.get("EXIF ExifImageLength")
+    if width_tag and height_tag:
         try:
-            with open(file_path, "rb") as f:
-                tags = exifread.process_file(
-                    f, stop_tag="EXIF DateTimeOriginal", details=False
-                )
-                date_tag = tags.get("EXIF DateTimeOriginal")
-                if date_tag:
-                    try:
-                        return datetime.strptime(str(date_tag), "%Y:%m:%d %H:%M:%S")
-                    except (ValueError, IndexError, TypeError):
-                        pass
-        except Exception:
+            width, height = int(width_tag.values[0]), int(height_tag.values[0])
+        except (ValueError, IndexError, TypeError):
             pass
 
+    return date, width, height
+
+
+def get_file_date(
+    file_path: str,
+    exif_date: Optional[datetime] = None,
+    mtime: Optional[float] = None,
+) -> Optional[datetime]:
+    """
+    Get the original date of a media file from EXIF or file modification
+    time. Pass mtime if the file has already been stat()ed.
+    """
+    if exif_date:
+        return exif_date
+
     # Fall back to file modification time
     try:
-        return datetime.fromtimestamp(os.path.getmtime(file_path))
+        if mtime is None:
+            mtime = os.path.getmtime(file_path)
+        return datetime.fromtimestamp(mtime)
     except Exception:
         return None
 
@@ -79,13 +123,15 @@ def get_size_threshold(file_date: Optional[datetime], ext: str) -> ThresholdConf
     """
     legacy = 1990
     year = file_date.year if file_date else legacy
-    active_map: Dict[int, ThresholdConfig] = (
-        PHOTO_THRESHOLDS if ext.lower() in PHOTO_EXT else VIDEO_THRESHOLDS
-    )
+    if ext_class(ext.lower()) == PHOTO:
+        active_map, boundaries = PHOTO_THRESHOLDS, _PHOTO_BOUNDARIES
+    else:
+        active_map, boundaries = VIDEO_THRESHOLDS, _VIDEO_BOUNDARIES
 
-    for boundary in sorted(active_map.keys()):
-        if year <= boundary:
-            return active_map[boundary]
+    # The first era boundary at or after the year
+    i = bisect_left(boundaries, year)
+    if i < len(boundaries):
+        return active_map[boundaries[i]]
 
     return active_map[legacy]
 
@@ -98,24 +144,33 @@ def check_file_health(file_path: str) -> Tuple[bool, str]:
         Tuple of (is_healthy, issue_description)
     """
     filename = os.path.basename(file_path)
-    ext = os.path.splitext(filename.lower())[1]
+    ext = file_ext(filename)
+    cls = ext_class(ext)
 
-    # Check if file exists and is accessible
+    # Check if file exists and is accessible; one stat gives both the size
+    # and the fallback date
     try:
-        file_size = os.path.getsize(file_path)
+        stat = os.stat(file_path)
     except OSError as e:
         return False, f"Cannot access file: {e}"
+    file_size = stat.st_size
 
     # Check for zero-byte files (always bad)
     if file_size == 0:
         return False, "Zero-byte file (ghost file)"
 
-    # Get file date and era-appropriate thresholds
-    file_date = get_file_date(file_path)
+    # Get file date and era-appropriate thresholds, reading the photo's
+    # EXIF date and dimensions together
+    exif_date: Optional[datetime] = None
+    exif_width: Optional[int] = None
+    exif_height: Optional[int] = None
+    if cls == PHOTO:
+        exif_date, exif_width, exif_height = scan_photo_meta(file_path)
+    file_date = get_file_date(file_path, exif_date, stat.st_mtime)
     thresholds = get_size_threshold(file_date, ext)
 
     # Check Photo/Video size
-    if ext in PHOTO_EXT.union(VIDEO_EXT):
+    if cls:
         if file_size < thresholds.min_bytes:
             return (
                 False,
@@ -123,27 +178,40 @@ def check_file_health(file_path: str) -> Tuple[bool, str]:
             )
 
     # Check only photo resolution
-    if ext in PHOTO_EXT:
+    if ext in RAW_EXT:
+        # Pillow can't decode camera RAW files, so rely on EXIF dimensions
+        if exif_width and exif_height:
+            issue = _resolution_issue(exif_width, exif_height, thresholds)
+            if issue:
+                return False, issue
+    elif cls == PHOTO:
         try:
             with Image.open(file_path) as img:
+                # Size is parsed from the header, so check for low
+                # resolution based on era before the costlier verify
+                width, height = img.size
+                issue = _resolution_issue(width, height, thresholds)
+                if issue:
+                    return False, issue
+
                 # Verify by loading the image data
                 img.verify()
 
-                # Check for low resolution based on era
-                with Image.open(file_path) as img_check:
-                    width, height = img_check.size
-                    if width < thresholds.min_width or height < thresholds.min_height:
-                        return (
-                            False,
-                            f"Suspiciously low resolution ({width}x{height} pixels, {thresholds.label} threshold: {thresholds.min_width}x{thresholds.min_height} pixels)",
-                        )
-
         except Exception as e:
             return False, f"Corrupted image: {e}"
 
     return True, "OK"
 
 
+def _resolution_issue(
+    width: int, height: int, thresholds: ThresholdConfig
+) -> Optional[str]:
+    """Describe a resolution below the era's threshold, or None if it's fine."""
+    if width < thresholds.min_width or height < thresholds.min_height:
+        return f"Suspiciously low resolution ({width}x{height} pixels, {thresholds.label} threshold: {thresholds.min_width}x{thresholds.min_height} pixels)"
+    return None
+
+
 def open_file_preview(file_path: str) -> None:
     """Open a file in the default viewer (macOS)."""
     try:
@@ -198,26 +266,25 @@ def health_check(
     healthy_count = 0
     total_count = 0
 
-    for dirpath, _, filenames in os.walk(root):
-        print(f"Checking {len(filenames)} files in {dirpath}")
-        for filename in filenames:
-            if filename.startswith("."):
-                continue
-
-            file_path = os.path.join(dirpath, filename)
-            ext = os.path.splitext(filename.lower())[1]
-
-            # Only check media files
-            if ext not in PHOTO_EXT and ext not in VIDEO_EXT:
-                continue
-
-            total_count += 1
-            is_healthy, issue = check_file_health(file_path)
-
-            if not is_healthy:
-                issues.append((file_path, issue))
-            else:
-                healthy_count += 1
+    # Image verification and EXIF parsing overlap across worker threads
+    with ThreadPoolExecutor(max_workers=IO_WORKERS) as pool:
+        for dirpath, entries in scan_tree(root):
+            print(f"Checking {len(entries)} files in {dirpath}")
+            media_paths: List[str] = []
+            for entry in entries:
+                # Only check media files
+                if not classify(entry.name):
+                    continue
+
+                media_paths.append(entry.path)
+
+            total_count += len(media_paths)
+            results = pool.map(check_file_health, media_paths)
+            for file_path, (is_healthy, issue) in zip(media_paths, results):
+                if not is_healthy:
+                    issues.append((file_path, issue))
+                else:
+                    healthy_count += 1
 
     # Display results
     if not issues:
@@ -239,12 +306,14 @@ def health_check(
             issue_groups[issue_type] = []
         issue_groups[issue_type].append((file_path, issue))
 
-    # Display grouped issues
+    # Display grouped issues, written at once rather than a print() per line
+    out: List[str] = []
     for issue_type, group in issue_groups.items():
-        print(f"\n{issue_type} ({len(group)} file(s)):")
+        out.append(f"\n{issue_type} ({len(group)} file(s)):")
         for file_path, issue in group:
-            print(f"  - {file_path}")
-            print(f"    Issue: {issue}")
+            out.append(f"  - {file_path}")
+            out.append(f"    Issue: {issue}")
+    sys.stdout.write("\n".join(out) + "\n")
 
     print(f"\n{'='*80}")
 
@@ -1,16 +1,94 @@
 """Organize media files into dated folder structures."""
 
+import atexit
+import errno
+import io
+import json
 import os
+import random
 import shutil
+import sqlite3
+import struct
 import subprocess
-from collections import Counter
+import sys
+import threading
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Tuple
+from typing import (
+    Any,
+    BinaryIO,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+)
 from enum import Enum, auto
 
 import exifread
 
-from constants import PHOTO_EXT, VIDEO_EXT
+from constants import (
+    EXT_CLASS,
+    PHOTO,
+    RAW_EXT,
+    classify,
+    file_ext,
+    parse_exif_datetime,
+)
+from dedupe import hash_file
+from exiftool import ExifToolDaemon, exiftool_available
+from fsutil import move_file
+from walk import scan_tree, scan_tree_bottom_up
+
+# Below this many photos, handing them to worker processes costs more
+# than it saves
+PARALLEL_MIN_PHOTOS = 64
+
+# Folders with more photos than this vote on their date with a random
+# sample of that many photo dates
+DATE_SAMPLE_MIN = 512
+DATE_SAMPLE_SIZE = 256
+
+# Vote on a folder's month by modification time when this share of a
+# random sample of that many photos has EXIF dates in the winning month
+FAST_CLASSIFY = True
+MTIME_CHECK_SIZE = 16
+MTIME_CHECK_AGREEMENT = 0.75
+
+# Photo formats that rarely carry an EXIF capture date; their mtime is used
+NO_EXIF_EXT = frozenset({".png"})
+
+# Threads reading EXIF blocks at once when exiftool isn't used, e.g.
+# MEDIA_JANITOR_EXIF_THREADS=1 to read one file at a time
+EXIF_THREADS = int(os.environ.get("MEDIA_JANITOR_EXIF_THREADS") or 16)
+
+# Folders classified at once ahead of the one being handled, and the
+# fewest folders for which that is worth starting threads in batch runs
+ORGANIZE_WORKERS = 4
+PARALLEL_MIN_FOLDERS = 8
+
+# Number of buffered output lines written to stdout at a time
+_OUTPUT_BATCH_LINES = 1000
+
+# Files moved at once when ungrouping a folder
+MOVE_WORKERS = 4
+
+# Leading bytes searched for the EXIF block by the fast date reader
+EXIF_SCAN_BYTES = 64 * 1024
+
+# Where EXIF dates are cached between runs
+DATE_CACHE_PATH = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+    "media-janitor",
+    "exifdates.sqlite",
+)
+
+# New cache rows written to disk at a time
+DATE_CACHE_BATCH = 1000
 
 
 class FolderAction(Enum):
@@ -22,58 +100,555 @@ class FolderAction(Enum):
     SKIP = auto()
 
 
-def get_photo_date(path: str) -> datetime:
-    """Attempts to extract EXIF date, falls back to file modification time."""
-    try:
-        with open(path, "rb") as f:
-            # We add details=False to skip complex tag parsing that often causes slice errors
-            tags = exifread.process_file(
-                f, stop_tag="EXIF DateTimeOriginal", details=False
+# Warnings raised while a folder is classified on a worker thread, held so
+# they are printed with that folder rather than over an open prompt
+_held_warnings = threading.local()
+
+
+def _warn(message: str) -> None:
+    """Print a warning, or hold it if this thread is classifying ahead."""
+    held: Optional[List[str]] = getattr(_held_warnings, "lines", None)
+    if held is None:
+        print(message)
+    else:
+        held.append(message)
+
+
+# A cached file's identity: (absolute path, size, mtime in nanoseconds)
+_CacheKey = Tuple[str, int, int]
+
+
+class _DateCache:
+    """
+    EXIF capture dates keyed by path and checked against each file's size
+    and mtime, persisted in SQLite so re-runs skip parsing files that
+    haven't changed. Rows are looked up one file at a time rather than
+    loading the whole cache, and new ones are written in batches.
+
+    A cached None records that a file has no usable EXIF date. Dates
+    imported with load_file_dates() take priority over the cache.
+    """
+
+    def __init__(self, cache_path: str) -> None:
+        self.cache_path = cache_path
+        self.db: Optional[sqlite3.Connection] = None
+        self.pending: List[Tuple[str, int, int, Optional[str]]] = []
+        self.file_dates: Dict[str, datetime] = {}
+        self.loaded = False
+        # Folders may be classified on worker threads
+        self.lock = threading.Lock()
+
+    def _load(self) -> None:
+        """Open the cache database on first use and save it again on exit."""
+        self.loaded = True
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            self.db = sqlite3.connect(self.cache_path, check_same_thread=False)
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS exif"
+                "(path TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, date TEXT)"
             )
-            date_tag = tags.get("EXIF DateTimeOriginal")
+        except (OSError, sqlite3.Error) as e:
+            _warn(f"  [!] Could not open EXIF date cache: {e}")
+            self.db = None
+        atexit.register(self.save)
+
+    def lookup(
+        self, path: str, stat: os.stat_result
+    ) -> Tuple[_CacheKey, bool, Optional[datetime]]:
+        """Return (cache key, found, EXIF date) for a file."""
+        abs_path = os.path.abspath(path)
+        key = (abs_path, stat.st_size, stat.st_mtime_ns)
+        if abs_path in self.file_dates:
+            return key, True, self.file_dates[abs_path]
+
+        with self.lock:
+            if not self.loaded:
+                self._load()
+            if self.db is None:
+                return key, False, None
+            row = self.db.execute(
+                "SELECT size, mtime, date FROM exif WHERE path = ?", (abs_path,)
+            ).fetchone()
 
-            if date_tag:
-                # Wrap the string conversion in a secondary try to catch 'slice' errors
+        if row is None or (row[0], row[1]) != key[1:]:
+            return key, False, None
+        return key, True, datetime.fromisoformat(row[2]) if row[2] else None
+
+    def store(self, key: _CacheKey, date: Optional[datetime]) -> None:
+        with self.lock:
+            self.pending.append((*key, date.isoformat() if date else None))
+            if len(self.pending) >= DATE_CACHE_BATCH:
+                self._write()
+
+    def _write(self) -> None:
+        """Write the pending rows in one transaction (lock held)."""
+        if self.db is None or not self.pending:
+            return
+        try:
+            with self.db:
+                self.db.executemany(
+                    "INSERT OR REPLACE INTO exif VALUES (?, ?, ?, ?)", self.pending
+                )
+        except sqlite3.Error as e:
+            _warn(f"  [!] Could not save EXIF date cache: {e}")
+        self.pending.clear()
+
+    def save(self) -> None:
+        """Write any dates added since the last batch to disk."""
+        with self.lock:
+            self._write()
+
+
+_date_cache = _DateCache(DATE_CACHE_PATH)
+
+# Shared exiftool process, started on first use if exiftool is installed
+_exiftool: Optional[ExifToolDaemon] = None
+_exiftool_checked = False
+_exiftool_lock = threading.Lock()
+
+
+def _get_exiftool() -> Optional[ExifToolDaemon]:
+    """Return the shared exiftool process, or None if exiftool isn't available."""
+    global _exiftool, _exiftool_checked
+    with _exiftool_lock:
+        if not _exiftool_checked:
+            _exiftool_checked = True
+            if exiftool_available():
                 try:
-                    return datetime.strptime(str(date_tag), "%Y:%m:%d %H:%M:%S")
-                except (ValueError, IndexError, TypeError) as e:
-                    print(f"  [!] Metadata corruption in {os.path.basename(path)}: {e}")
-    except Exception as e:
+                    _exiftool = ExifToolDaemon()
+                    _exiftool.start()
+                    atexit.register(_exiftool.close)
+                except OSError:
+                    _exiftool = None
+    return _exiftool
+
+
+# Shared exifread worker processes, started on first use so folders (and
+# the threads classifying them) don't each pay for process start-up
+_exif_pool: Optional[ProcessPoolExecutor] = None
+_exif_pool_lock = threading.Lock()
+
+
+def _get_exif_pool() -> ProcessPoolExecutor:
+    """Return the shared exifread process pool, starting it if needed."""
+    global _exif_pool
+    with _exif_pool_lock:
+        if _exif_pool is None:
+            _exif_pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+            atexit.register(_exif_pool.shutdown)
+    return _exif_pool
+
+
+def _read_exif_dates(paths: List[str]) -> List[Optional[datetime]]:
+    """
+    Read the EXIF dates of many photos, in batches through exiftool when it
+    is installed. Otherwise (or if exiftool fails) the fast EXIF reader runs
+    on a thread pool, and only files it can't parse go to exifread, in
+    worker processes when there are enough files to be worth it.
+    """
+    global _exiftool
+    # exiftool reads its arguments one per line
+    if paths and all("\n" not in path for path in paths):
+        exiftool = _get_exiftool()
+        if exiftool:
+            try:
+                return exiftool.get_dates(paths)
+            except (OSError, ValueError) as e:
+                _warn(f"  [!] exiftool failed ({e}), falling back to exifread")
+                exiftool.close()
+                _exiftool = None
+
+    # The fast reader mostly waits on reads, so threads overlap it well
+    if EXIF_THREADS > 1 and len(paths) > 1:
+        with ThreadPoolExecutor(max_workers=EXIF_THREADS) as pool:
+            fast = list(pool.map(_fast_exif_datetime, paths))
+    else:
+        fast = [_fast_exif_datetime(path) for path in paths]
+    dates = [date for _, date in fast]
+
+    # Files in layouts the fast reader doesn't know go to exifread, whose
+    # parsing holds the GIL and so runs in processes when there are many
+    slow = [i for i, (parsed, _) in enumerate(fast) if not parsed]
+    slow_paths = [paths[i] for i in slow]
+    if len(slow) < PARALLEL_MIN_PHOTOS:
+        slow_dates = [_exifread_date(path) for path in slow_paths]
+    else:
+        pool = _get_exif_pool()
+        slow_dates = list(pool.map(_exifread_date, slow_paths, chunksize=32))
+
+    # Warnings come back with the dates, so worker processes never print
+    for i, (date, warning) in zip(slow, slow_dates):
+        dates[i] = date
+        if warning:
+            _warn(warning)
+    return dates
+
+
+def load_file_dates(file_dates_path: str) -> None:
+    """
+    Import a dictionary of known dates from a JSON file mapping file paths
+    to ISO 8601 dates (e.g. {"trip/IMG_0001.jpg": "2021-06-15T14:30:00"}).
+    Relative paths are resolved against the JSON file's folder.
+    """
+    base_dir = os.path.dirname(os.path.abspath(file_dates_path))
+    with open(file_dates_path, encoding="utf-8") as f:
+        file_dates = json.load(f)
+
+    for path, date_str in file_dates.items():
+        abs_path = os.path.abspath(os.path.join(base_dir, path))
+        _date_cache.file_dates[abs_path] = datetime.fromisoformat(date_str)
+
+
+def _ifd_entry(
+    tiff: bytes, endian: str, ifd_offset: int, tag: int
+) -> Optional[Tuple[int, int, int]]:
+    """Find a tag in a TIFF IFD, returning its (type, count, value/offset)."""
+    (count,) = struct.unpack_from(endian + "H", tiff, ifd_offset)
+    for i in range(count):
+        entry_tag, entry_type, entry_count, value = struct.unpack_from(
+            endian + "HHII", tiff, ifd_offset + 2 + 12 * i
+        )
+        if entry_tag == tag:
+            return entry_type, entry_count, value
+    return None
+
+
+def _fast_exif_datetime(path: str) -> Tuple[bool, Optional[datetime]]:
+    """
+    Read DateTimeOriginal straight from the EXIF block at the start of a
+    JPEG (its APP1 segment) or TIFF-based RAW file, without exifread's
+    general tag walk.
+
+    Returns:
+        Tuple of (parsed, date). parsed is False whenever the layout isn't
+        the expected one, so callers can fall back to exifread; a parsed
+        file with no date needs no second look.
+    """
+    try:
+        # Unbuffered: the block is fetched with a single read() straight
+        # into the result, without setting up a read buffer per file
+        with open(path, "rb", buffering=0) as f:
+            head = f.read(EXIF_SCAN_BYTES)
+    except OSError:
+        return False, None
+
+    try:
+        if head[:2] == b"\xff\xd8":
+            # Walk the JPEG segments up to the APP1 "Exif" one
+            tiff = b""
+            pos = 2
+            while pos + 4 <= len(head) and head[pos] == 0xFF:
+                marker = head[pos + 1]
+                (length,) = struct.unpack_from(">H", head, pos + 2)
+                if marker == 0xE1 and head[pos + 4 : pos + 10] == b"Exif\0\0":
+                    tiff = head[pos + 10 : pos + 2 + length]
+                    break
+                if marker == 0xDA:
+                    # Start of image data: no EXIF block ahead
+                    return True, None
+                pos += 2 + length
+        elif head[:4] in (b"II*\0", b"MM\0*"):
+            tiff = head
+        else:
+            return False, None
+
+        endian = {b"II": "<", b"MM": ">"}.get(tiff[:2])
+        if endian is None:
+            return False, None
+
+        # IFD0 -> Exif sub-IFD (0x8769) -> DateTimeOriginal (0x9003)
+        (ifd0_offset,) = struct.unpack_from(endian + "I", tiff, 4)
+        exif_ifd = _ifd_entry(tiff, endian, ifd0_offset, 0x8769)
+        if exif_ifd is None:
+            return True, None
+        date_entry = _ifd_entry(tiff, endian, exif_ifd[2], 0x9003)
+        if date_entry is None:
+            return True, None
+        if date_entry[0] != 2 or date_entry[1] < 19:
+            return False, None
+
+        offset = date_entry[2]
+        date = parse_exif_datetime(tiff[offset : offset + 19])
+        # A malformed date is left for exifread to report
+        return date is not None, date
+    except (struct.error, ValueError, IndexError):
+        return False, None
+
+
+def _exifread_tags(f: BinaryIO) -> Dict[str, Any]:
+    """Run exifread over a file object, stopping at DateTimeOriginal."""
+    # We add details=False to skip complex tag parsing that often causes slice errors
+    return exifread.process_file(f, stop_tag="EXIF DateTimeOriginal", details=False)
+
+
+def _exifread_date(path: str) -> Tuple[Optional[datetime], Optional[str]]:
+    """
+    Read the EXIF date of a photo with exifread, or None if it has none,
+    along with a warning to report if its EXIF data couldn't be used.
+    """
+    try:
+        with open(path, "rb") as f:
+            # Parse the leading bytes from memory first, rather than letting
+            # exifread seek and read through the file in small pieces
+            head = f.read(EXIF_SCAN_BYTES)
+            try:
+                tags = _exifread_tags(io.BytesIO(head))
+            except Exception:
+                # The head was the whole file, so there is nothing more to try
+                if len(head) < EXIF_SCAN_BYTES:
+                    raise
+                tags = {}
+            # Some RAW and HEIC files keep their EXIF block further in
+            if "EXIF DateTimeOriginal" not in tags and len(head) == EXIF_SCAN_BYTES:
+                f.seek(0)
+                tags = _exifread_tags(f)
+    except Exception:
         # Catch-all for exifread internal errors like "Unexpected slice length"
-        print(
+        return None, (
             f"  [!] Could not parse EXIF for {os.path.basename(path)}. Using file date."
         )
 
-    return datetime.fromtimestamp(os.path.getmtime(path))
+    date_tag = tags.get("EXIF DateTimeOriginal")
+    if not date_tag:
+        return None, None
+    # ASCII tag values are already strings, so the tag isn't str()-formatted
+    date = parse_exif_datetime(date_tag.values)
+    if date is None:
+        return None, (
+            f"  [!] Metadata corruption in {os.path.basename(path)}: "
+            f"invalid date {date_tag.values!r}"
+        )
+    return date, None
+
+
+# Modification-time datetimes by whole second: files copied or imported
+# together often share an mtime, so most lookups skip building a datetime
+_mtime_datetimes: Dict[int, datetime] = {}
+
+
+def _mtime_datetime(stat: os.stat_result) -> datetime:
+    """
+    Return a file's modification time as a datetime, to the whole second
+    (only the year and month are used for sorting).
+    """
+    ts = int(stat.st_mtime)
+    date = _mtime_datetimes.get(ts)
+    if date is None:
+        date = _mtime_datetimes[ts] = datetime.fromtimestamp(ts)
+    return date
+
+
+def _is_year_folder(name: str) -> bool:
+    """Year folders (e.g. "2021") hold media that is already organized."""
+    # The length test rejects almost every other name before isdigit scans it
+    return len(name) == 4 and name.isdigit()
+
+
+def _scan_media(folder_path: str) -> Tuple[List[os.DirEntry], List[os.DirEntry]]:
+    """
+    Return the (photo, video) DirEntries of every media file under
+    folder_path, skipping hidden files and folders and already organized
+    year folders.
+    """
+    photos: List[os.DirEntry] = []
+    videos: List[os.DirEntry] = []
+    # Each media extension maps straight to the list its files are added to
+    adder_for = {
+        ext: photos.append if cls == PHOTO else videos.append
+        for ext, cls in EXT_CLASS.items()
+    }.get
+    for _, entries in scan_tree(folder_path, prune=_is_year_folder):
+        for entry in entries:
+            add = adder_for(file_ext(entry.name))
+            if add:
+                add(entry)
+    return photos, videos
+
+
+def _get_photo_dates(
+    paths: List[str], stats: List[os.stat_result]
+) -> List[datetime]:
+    """Get the dates of many photos, reading EXIF data missing from the cache."""
+    lookups = [_date_cache.lookup(path, st) for path, st in zip(paths, stats)]
+    exif_dates = [date for _, _, date in lookups]
+
+    # Formats that rarely carry a capture date go straight to their mtime
+    misses = [
+        i
+        for i, (_, found, _) in enumerate(lookups)
+        if not found and file_ext(paths[i]) not in NO_EXIF_EXT
+    ]
+    parsed = _read_exif_dates([paths[i] for i in misses])
+
+    for i, exif_date in zip(misses, parsed):
+        exif_dates[i] = exif_date
+        _date_cache.store(lookups[i][0], exif_date)
+
+    return [
+        exif_date or _mtime_datetime(stat)
+        for exif_date, stat in zip(exif_dates, stats)
+    ]
+
+
+class _MediaFile(NamedTuple):
+    """
+    A media file found by classify_folder, with its resolved date (None for
+    photos left out of a sampled date vote) and the stat result the scan
+    already fetched, so reading a date later needs no second stat.
+    """
+
+    path: str
+    date: Optional[datetime]
+    is_photo: bool
+    stat: os.stat_result
+
+
+def _check_mtime_vote(
+    photos: List[os.DirEntry],
+    readable: List[int],
+    month_counts: Counter,
+    photo_dates: List[Optional[datetime]],
+) -> Optional[Counter]:
+    """
+    Vote on the folder's month by modification time alone, then check the
+    EXIF dates of a few random photos (from the readable indexes) against it.
+
+    Returns:
+        The mtime-based counts (with the checked photos' dates filled into
+        photo_dates) if enough of the sample agrees, else None
+    """
+    mtime_counts = month_counts.copy()
+    for entry in photos:
+        date = _mtime_datetime(entry.stat())
+        mtime_counts[(date.year, date.month)] += 1
+    target = choose_target_date(mtime_counts)
+
+    checked = random.sample(readable, min(MTIME_CHECK_SIZE, len(readable)))
+    checked_dates = _get_photo_dates(
+        [photos[i].path for i in checked], [photos[i].stat() for i in checked]
+    )
+    agreeing = sum((date.year, date.month) == target for date in checked_dates)
+    if agreeing < MTIME_CHECK_AGREEMENT * len(checked):
+        return None
+
+    for i, date in zip(checked, checked_dates):
+        photo_dates[i] = date
+    return mtime_counts
+
+
+def classify_folder(
+    folder_path: str,
+) -> Tuple[List[_MediaFile], Counter, int, int]:
+    """
+    Scans folder for media and returns a manifest of its media files with
+    their dates, the number of files per (year, month), and the photo and
+    video counts.
+
+    Photo dates only decide the folder's most common month, so they are
+    read sparingly. With FAST_CLASSIFY, the photos' modification times vote
+    first and are kept if a small EXIF sample agrees. Otherwise, in folders
+    of more than DATE_SAMPLE_MIN photos only a random sample of
+    DATE_SAMPLE_SIZE photo dates is read, each counted for its share of all
+    the photos. Camera RAW files, the slowest to parse, always vote by
+    modification time. Photos whose dates weren't read are left undated in
+    the manifest.
+    """
+    photos, videos = _scan_media(folder_path)
+    month_counts: Counter = Counter()
+
+    video_files: List[_MediaFile] = []
+    for entry in videos:
+        stat = entry.stat()
+        date = _mtime_datetime(stat)
+        month_counts[(date.year, date.month)] += 1
+        video_files.append(_MediaFile(entry.path, date, False, stat))
+
+    # Indexes of the photos whose EXIF dates are read for the vote, and of
+    # the RAW files, which vote by mtime
+    readable: List[int] = []
+    raw: List[int] = []
+    for i, entry in enumerate(photos):
+        (raw if file_ext(entry.name) in RAW_EXT else readable).append(i)
+
+    photo_dates: List[Optional[datetime]] = [None] * len(photos)
+    mtime_counts = None
+    if FAST_CLASSIFY and len(photos) > MTIME_CHECK_SIZE:
+        mtime_counts = _check_mtime_vote(photos, readable, month_counts, photo_dates)
+
+    if mtime_counts is not None:
+        month_counts = mtime_counts
+    else:
+        for i in raw:
+            date = _mtime_datetime(photos[i].stat())
+            month_counts[(date.year, date.month)] += 1
+
+        dated: List[int] = readable
+        weight: float = 1
+        if len(readable) > DATE_SAMPLE_MIN:
+            dated = sorted(random.sample(readable, DATE_SAMPLE_SIZE))
+            weight = len(readable) / DATE_SAMPLE_SIZE
+
+        sampled_dates = _get_photo_dates(
+            [photos[i].path for i in dated], [photos[i].stat() for i in dated]
+        )
+        for i, date in zip(dated, sampled_dates):
+            photo_dates[i] = date
+            month_counts[(date.year, date.month)] += weight
+
+    manifest: List[_MediaFile] = [
+        _MediaFile(entry.path, date, True, entry.stat())
+        for entry, date in zip(photos, photo_dates)
+    ]
+    manifest.extend(video_files)
 
+    return manifest, month_counts, len(photos), len(videos)
 
-def classify_folder(folder_path: str) -> Tuple[List[datetime], int, int]:
-    """Scans folder for media and returns dates and counts."""
-    dates: List[datetime] = []
-    photo_count: int = 0
-    video_count: int = 0
 
-    for root, _, files in os.walk(folder_path):
-        for name in files:
-            if name.startswith("."):
-                continue
-            ext = os.path.splitext(name.lower())[1]
-            path = os.path.join(root, name)
+def _classify_folder_held(
+    folder_path: str,
+) -> Tuple[Tuple[List[_MediaFile], Counter, int, int], List[str]]:
+    """Run classify_folder, returning its result and the warnings it held."""
+    _held_warnings.lines = lines = []
+    try:
+        return classify_folder(folder_path), lines
+    finally:
+        _held_warnings.lines = None
+
 
-            if ext in PHOTO_EXT:
-                photo_count += 1
-                dates.append(get_photo_date(path))
-            elif ext in VIDEO_EXT:
-                video_count += 1
-                dates.append(datetime.fromtimestamp(os.path.getmtime(path)))
+def _classify_folders(
+    folders: List[str],
+) -> Iterator[Tuple[List[_MediaFile], Counter, int, int]]:
+    """
+    Yield classify_folder's result for each folder in order, classifying
+    the folders ahead on worker threads.
 
-    return dates, photo_count, video_count
+    Folders come bottom-up and each one is moved once its result is
+    handled, so a folder is only submitted when no folder inside it is
+    still waiting to be handled. Each folder's warnings are held on its
+    worker and printed here, on the main thread, as its result is yielded.
+    """
+    with ThreadPoolExecutor(max_workers=ORGANIZE_WORKERS) as pool:
+        pending: deque = deque()
+        next_index = 0
+        while pending or next_index < len(folders):
+            while next_index < len(folders) and len(pending) < ORGANIZE_WORKERS * 2:
+                prefix = folders[next_index] + os.sep
+                if any(folder.startswith(prefix) for folder, _ in pending):
+                    break
+                future = pool.submit(_classify_folder_held, folders[next_index])
+                pending.append((folders[next_index], future))
+                next_index += 1
 
+            _, future = pending.popleft()
+            result, warnings = future.result()
+            _write_lines(warnings)
+            yield result
 
-def choose_target_date(dates: List[datetime]) -> Tuple[int, int]:
-    """Finds the most frequent Year and Month in the date list."""
-    counts = Counter((d.year, d.month) for d in dates)
-    return counts.most_common(1)[0][0]
+
+def choose_target_date(month_counts: Counter) -> Tuple[int, int]:
+    """Finds the most frequent Year and Month in the (year, month) counts."""
+    return month_counts.most_common(1)[0][0]
 
 
 def open_folder_in_finder(folder_path: str) -> None:
@@ -117,47 +692,229 @@ def prompt_user(
             return FolderAction.RENAME, new_name or folder_name
 
 
+def _move_folder_new(src: str, dest_path: str) -> bool:
+    """
+    Move a folder to dest_path unless something already exists there.
+
+    rename refuses to replace a file or a non-empty folder, so within one
+    volume the move itself detects the collision without a separate
+    existence check. (An empty folder at dest_path is replaced, losing
+    nothing.) Across volumes this falls back to checking and moving.
+
+    Returns:
+        False if dest_path already existed and nothing was moved
+    """
+    try:
+        os.rename(src, dest_path)
+    except OSError as e:
+        if e.errno in (errno.EEXIST, errno.ENOTEMPTY, errno.ENOTDIR):
+            return False
+        if e.errno != errno.EXDEV:
+            raise
+        if os.path.exists(dest_path):
+            return False
+        shutil.move(src, dest_path)
+    return True
+
+
+def _move_file_new(src: str, dest_path: str) -> bool:
+    """
+    Move a file to dest_path unless something already exists there.
+
+    Hard-linking fails atomically when dest_path exists, so no separate
+    existence check is needed. Where links aren't supported (or across
+    volumes) the name is claimed by exclusively creating an empty file
+    there, which the move then replaces, so files moved at once can't
+    both take it.
+
+    Returns:
+        False if dest_path already existed and nothing was moved
+    """
+    try:
+        os.link(src, dest_path)
+    except FileExistsError:
+        return False
+    except OSError:
+        try:
+            fd = os.open(dest_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL)
+        except FileExistsError:
+            return False
+        os.close(fd)
+        try:
+            move_file(src, dest_path)
+        except BaseException:
+            os.unlink(dest_path)
+            raise
+        return True
+    os.unlink(src)
+    return True
+
+
+# Folders that files or folders were moved out of during organize(), plus
+# folders found empty while scanning: the only candidates for cleanup
+_vacated_folders: Set[str] = set()
+
+
+# Destination folders already created during this run
+_made_dirs: Set[str] = set()
+
+
+def _makedirs(path: str) -> None:
+    """os.makedirs(exist_ok=True), skipped for folders already made this run."""
+    if path not in _made_dirs:
+        os.makedirs(path, exist_ok=True)
+        _made_dirs.add(path)
+
+
+def _same_content(path: str, other_path: str) -> Tuple[bool, Optional[str]]:
+    """
+    Check whether two files hold the same bytes, comparing sizes first.
+    Files that can't be read count as different, with a warning returned
+    for the caller's output rather than printed from a move worker.
+    """
+    try:
+        if os.stat(path).st_size != os.stat(other_path).st_size:
+            return False, None
+    except OSError:
+        return False, None
+    try:
+        return hash_file(path) == hash_file(other_path), None
+    except Exception as e:
+        return False, (
+            f"  [!] Could not compare {os.path.basename(path)} "
+            f"with {other_path}: {e}"
+        )
+
+
+def _move_file_dedupe(
+    src: str, dest_path: str
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Move a file to dest_path. If a file is already there, an identical
+    copy of src is removed instead, and a different file is kept by moving
+    src to the first free "name_N.ext" beside it.
+
+    Returns:
+        The path the file was moved to (None if src was a duplicate), and
+        any warning from comparing the two files
+    """
+    if _move_file_new(src, dest_path):
+        return dest_path, None
+    same, warning = _same_content(src, dest_path)
+    if same:
+        os.remove(src)
+        return None, warning
+
+    stem, ext = os.path.splitext(dest_path)
+    n = 1
+    while not _move_file_new(src, f"{stem}_{n}{ext}"):
+        n += 1
+    return f"{stem}_{n}{ext}", warning
+
+
+def _describe_dry_run_move(src: str, dest_path: str) -> Tuple[str, Optional[str]]:
+    """
+    Describe what _move_file_dedupe would do with src, along with any
+    warning from comparing it to the file already at dest_path.
+    """
+    name = os.path.basename(src)
+    if not os.path.exists(dest_path):
+        return f"Move file: {name} -> {os.path.dirname(dest_path)}", None
+    same, warning = _same_content(src, dest_path)
+    if same:
+        return f"Remove identical duplicate: {src} (keeping {dest_path})", warning
+    return (
+        f"Move file under a new name: {name} -> {os.path.dirname(dest_path)}",
+        warning,
+    )
+
+
+def _describe_move(src: str, moved_to: Optional[str]) -> str:
+    """Describe the outcome of _move_file_dedupe."""
+    if moved_to is None:
+        return f"Removed identical duplicate: {src}"
+    return f"Moving file: {os.path.basename(src)} -> {moved_to}"
+
+
+def _write_lines(lines: List[str]) -> None:
+    """Write buffered output lines to stdout at once and clear the buffer."""
+    if lines:
+        sys.stdout.write("\n".join(lines) + "\n")
+        lines.clear()
+
+
 def move_individual_files(
-    src_folder: str, photo_root: str, video_root: str, dry_run: bool
+    src_folder: str,
+    manifest: List[_MediaFile],
+    photo_root: str,
+    video_root: str,
+    dry_run: bool,
 ) -> None:
-    """Moves files out of the folder individually into YYYY/MM/ structure."""
-    for root, _, files in os.walk(src_folder):
-        for name in files:
-            if name.startswith("."):
-                continue
-
-            path = os.path.join(root, name)
-            ext = os.path.splitext(name.lower())[1]
-
-            if ext in PHOTO_EXT:
-                date = get_photo_date(path)
-                dest_root = photo_root
-            elif ext in VIDEO_EXT:
-                date = datetime.fromtimestamp(os.path.getmtime(path))
-                dest_root = video_root
-            else:
-                continue
+    """
+    Moves files out of the folder individually into YYYY/MM/ structure,
+    using the dates classify_folder already resolved for them.
+    """
+    # Photos whose dates were skipped by a sampled vote are read now
+    undated = [file for file in manifest if file.date is None]
+    if undated:
+        dates = iter(
+            _get_photo_dates(
+                [file.path for file in undated], [file.stat for file in undated]
+            )
+        )
+        manifest = [
+            file._replace(date=next(dates)) if file.date is None else file
+            for file in manifest
+        ]
 
-            dest_dir = os.path.join(dest_root, str(date.year), f"{date.month:02d}")
-            os.makedirs(dest_dir, exist_ok=True)
-            dest_path = os.path.join(dest_dir, name)
+    # Group files by destination so each YYYY/MM folder is created once
+    buckets: Dict[Tuple[str, int, int], List[str]] = defaultdict(list)
+    for path, date, is_photo, _ in manifest:
+        dest_root = photo_root if is_photo else video_root
+        buckets[(dest_root, date.year, date.month)].append(path)
+        if not dry_run:
+            _vacated_folders.add(os.path.dirname(path))
 
-            if os.path.exists(dest_path):
-                print(f"[!] File already exists, skipping: {name}")
-                continue
+    moves: List[Tuple[str, str]] = []
+    for (dest_root, year, month), paths in buckets.items():
+        dest_dir = os.path.join(dest_root, str(year), f"{month:02d}")
+        _makedirs(dest_dir)
+        moves.extend(
+            (path, os.path.join(dest_dir, os.path.basename(path))) for path in paths
+        )
 
-            if dry_run:
-                print(f"[DRY RUN] Move file: {name} -> {dest_dir}")
-            else:
-                print(f"Moving file: {name} -> {dest_path}")
-                shutil.move(path, dest_path)
+    # Per-file lines are buffered and written in batches rather than one
+    # print() (and stdout flush) per file
+    out: List[str] = []
+    if dry_run:
+        for path, dest_path in moves:
+            description, warning = _describe_dry_run_move(path, dest_path)
+            if warning:
+                out.append(warning)
+            out.append(f"[DRY RUN] {description}")
+            if len(out) >= _OUTPUT_BATCH_LINES:
+                _write_lines(out)
+    elif moves:
+        # Moves across volumes (e.g. onto a network share) are copies that
+        # wait on I/O, so several run at once; results print in order
+        with ThreadPoolExecutor(max_workers=MOVE_WORKERS) as pool:
+            moved = pool.map(lambda move: _move_file_dedupe(*move), moves)
+            for (path, _), (moved_to, warning) in zip(moves, moved):
+                if warning:
+                    out.append(warning)
+                out.append(_describe_move(path, moved_to))
+                if len(out) >= _OUTPUT_BATCH_LINES:
+                    _write_lines(out)
+    _write_lines(out)
 
     if not dry_run:
+        # rmdir refuses non-empty folders itself, so there's no need to
+        # list the folder first
         try:
-            if not os.listdir(src_folder):
-                os.rmdir(src_folder)
-        except Exception as e:
-            print(f"  [!] Could not delete folder {src_folder}: {e}")
+            os.rmdir(src_folder)
+        except OSError as e:
+            if e.errno not in (errno.ENOTEMPTY, errno.EEXIST):
+                print(f"  [!] Could not delete folder {src_folder}: {e}")
 
 
 def move_entire_folder(
@@ -165,22 +922,31 @@ def move_entire_folder(
 ) -> None:
     """Moves the entire directory into the Year/Month structure."""
     dest_dir = os.path.join(dest_root, str(year), f"{month:02d}")
-    os.makedirs(dest_dir, exist_ok=True)
+    _makedirs(dest_dir)
     dest_path = os.path.join(dest_dir, name)
 
-    if os.path.exists(dest_path):
+    if dry_run:
+        if os.path.exists(dest_path):
+            print(f"  [!] Destination folder already exists: {dest_path}")
+        else:
+            print(f"  [DRY RUN] Would move folder: {src} -> {dest_path}")
+        return
+
+    if not _move_folder_new(src, dest_path):
         print(f"  [!] Destination folder already exists: {dest_path}")
         return
 
-    if dry_run:
-        print(f"  [DRY RUN] Would move folder: {src} -> {dest_path}")
-    else:
-        print(f"  --> Moving folder: {name} into {year}/{month:02d}/")
-        shutil.move(src, dest_path)
+    print(f"  --> Moving folder: {name} into {year}/{month:02d}/")
+    _vacated_folders.add(os.path.dirname(src))
 
 
 def organize(
-    source: str, photo_dest: str, video_dest: str, dry_run: bool, interactive: bool
+    source: str,
+    photo_dest: str,
+    video_dest: str,
+    dry_run: bool,
+    interactive: bool,
+    file_dates: Optional[str] = None,
 ) -> None:
     """
     Organize media files from source into photo and video destinations.
@@ -191,91 +957,124 @@ def organize(
         video_dest: Destination directory for videos
         dry_run: If True, only show what would be done
         interactive: If True, prompt user for actions on each folder
+        file_dates: Optional JSON file of known dates (path -> ISO date)
     """
     if not os.path.exists(source):
         print(f"Error: {source} is not accessible.")
         return
 
+    if file_dates:
+        try:
+            load_file_dates(file_dates)
+        except (OSError, ValueError, AttributeError) as e:
+            print(f"Error: Could not load file dates from {file_dates}: {e}")
+            return
+
     print(f"\nScanning {source} for media files and folders...\n")
 
     # Track folders that have been processed
     processed_paths = set()
+    _vacated_folders.clear()
+    _made_dirs.clear()
 
     # First pass: collect all directories
     directories_to_process = []
-    loose_files_in_root = []
-
-    # Walk bottom-up so children are processed before parents
-    for dirpath, dirnames, filenames in os.walk(source, topdown=False):
-        # Skip already processed year folders
-        dirnames[:] = [d for d in dirnames if not (d.isdigit() and len(d) == 4)]
+    loose_files_in_root: List[Tuple[os.DirEntry, int]] = []
 
+    # Walk bottom-up so children are processed before parents, skipping
+    # already processed year folders
+    for dirpath, dirnames, entries in scan_tree_bottom_up(
+        source, prune=_is_year_folder
+    ):
         # Get relative path for display
         rel_path = os.path.relpath(dirpath, source)
         if rel_path == ".":
             rel_path = "<root>"
 
         # Count media files in current directory (not in subdirs)
-        media_files = [f for f in filenames
-                      if not f.startswith(".")
-                      and os.path.splitext(f.lower())[1] in PHOTO_EXT.union(VIDEO_EXT)]
+        # Each file's class is kept so loose files aren't classified twice
+        media_files = [
+            (entry, cls) for entry in entries if (cls := classify(entry.name))
+        ]
 
         print(f"Checking {len(media_files)} media file(s) in {rel_path}")
 
         # If we're in the source root directory, handle loose files separately
         if dirpath == source:
-            if media_files:
-                loose_files_in_root = [(os.path.join(dirpath, f), f) for f in media_files]
+            loose_files_in_root = media_files
             # Don't process source as a folder, just its subdirectories
             continue
 
         # For subdirectories, add to processing queue if they have media
         if media_files or dirnames:  # Process if has media or subdirectories
             directories_to_process.append(dirpath)
+        elif not entries:
+            _vacated_folders.add(dirpath)
 
     # Process loose files in root directory
     if loose_files_in_root:
         print(f"\nProcessing {len(loose_files_in_root)} loose file(s) in source root...")
-        for file_path, filename in loose_files_in_root:
-            ext = os.path.splitext(filename.lower())[1]
+        # Photo dates are read together, as classify_folder does
+        loose_photos = [entry for entry, cls in loose_files_in_root if cls == PHOTO]
+        photo_dates = iter(
+            _get_photo_dates(
+                [entry.path for entry in loose_photos],
+                [entry.stat() for entry in loose_photos],
+            )
+        )
+        out: List[str] = []
+        for entry, cls in loose_files_in_root:
+            file_path, filename = entry.path, entry.name
 
-            if ext in PHOTO_EXT:
-                date = get_photo_date(file_path)
+            if cls == PHOTO:
+                date = next(photo_dates)
                 dest_root = photo_dest
-            elif ext in VIDEO_EXT:
-                date = datetime.fromtimestamp(os.path.getmtime(file_path))
-                dest_root = video_dest
             else:
-                continue
+                date = _mtime_datetime(entry.stat())
+                dest_root = video_dest
 
             dest_dir = os.path.join(dest_root, str(date.year), f"{date.month:02d}")
-            os.makedirs(dest_dir, exist_ok=True)
+            _makedirs(dest_dir)
             dest_path = os.path.join(dest_dir, filename)
 
-            if os.path.exists(dest_path):
-                print(f"  [!] File already exists, skipping: {filename}")
-                continue
-
             if dry_run:
-                print(f"  [DRY RUN] Would move: {filename} -> {dest_dir}")
+                description, warning = _describe_dry_run_move(file_path, dest_path)
+                if warning:
+                    out.append(warning)
+                out.append(f"  [DRY RUN] {description}")
             else:
-                print(f"  --> Moving: {filename}")
-                shutil.move(file_path, dest_path)
+                moved_to, warning = _move_file_dedupe(file_path, dest_path)
+                if warning:
+                    out.append(warning)
+                out.append(f"  --> {_describe_move(file_path, moved_to)}")
+            if len(out) >= _OUTPUT_BATCH_LINES:
+                _write_lines(out)
+        _write_lines(out)
 
     # Process subdirectories
     print(f"\nProcessing {len(directories_to_process)} folder(s)...\n")
-    for folder_path in directories_to_process:
+
+    # Folders are classified ahead on worker threads: while a prompt waits
+    # for an answer, or in larger batch runs
+    if interactive or len(directories_to_process) >= PARALLEL_MIN_FOLDERS:
+        classified = _classify_folders(directories_to_process)
+    else:
+        classified = map(classify_folder, directories_to_process)
+
+    for folder_path, folder_info in zip(directories_to_process, classified):
         if folder_path in processed_paths:
             continue
 
         folder_name = os.path.basename(folder_path)
 
-        # Classify the folder
-        dates, photos, videos = classify_folder(folder_path)
-        if not dates:
+        # Bound the mtime memo; files rarely share mtimes across folders
+        _mtime_datetimes.clear()
+
+        manifest, month_counts, photos, videos = folder_info
+        if not manifest:
             continue
 
-        year, month = choose_target_date(dates)
+        year, month = choose_target_date(month_counts)
         target_root = photo_dest if photos >= videos else video_dest
 
         action = FolderAction.ACCEPT
@@ -292,7 +1091,9 @@ def organize(
             continue
         elif action == FolderAction.UNGROUP:
             print(f"  Ungrouping {folder_name}...")
-            move_individual_files(folder_path, photo_dest, video_dest, dry_run)
+            move_individual_files(
+                folder_path, manifest, photo_dest, video_dest, dry_run
+            )
             processed_paths.add(folder_path)
         else:
             # Covers ACCEPT and RENAME
@@ -306,33 +1107,54 @@ def organize(
     # Clean up empty folders
     if not dry_run:
         print(f"\nCleaning up empty folders in {source}...")
-        remove_empty_folders(source)
+        remove_empty_folders(source, _vacated_folders)
+
 
+def remove_empty_folders(root: str, folders: Optional[Iterable[str]] = None) -> None:
+    """
+    Remove empty folders from the directory tree.
 
-def remove_empty_folders(root: str) -> None:
-    """Remove all empty folders from the directory tree."""
+    Args:
+        root: Root directory to clean up (never removed itself)
+        folders: If given, only these folders and the folders above them
+            are candidates, rather than every folder under root
+    """
     deleted_count = 0
-    
-    # Walk bottom-up so we can delete child folders before checking parents
-    for dirpath, dirnames, filenames in os.walk(root, topdown=False):
+
+    if folders is None:
+        candidates = [dirpath for dirpath, _, _ in os.walk(root, topdown=False)]
+    else:
+        # Add each folder's parents, which are emptied when it's removed
+        root = os.path.normpath(root)
+        prefix = os.path.join(root, "")
+        ancestors: Set[str] = set()
+        for folder in folders:
+            folder = os.path.normpath(folder)
+            while folder.startswith(prefix) and folder not in ancestors:
+                ancestors.add(folder)
+                folder = os.path.dirname(folder)
+        # Deepest first, so child folders are removed before their parents
+        candidates = sorted(ancestors, key=lambda path: -path.count(os.sep))
+
+    for dirpath in candidates:
         # Skip the root directory itself
         if dirpath == root:
             continue
-        
+
         # Skip year folders (4-digit names)
-        folder_name = os.path.basename(dirpath)
-        if folder_name.isdigit() and len(folder_name) == 4:
+        if _is_year_folder(os.path.basename(dirpath)):
             continue
-        
-        # Check if directory is empty (no files and no subdirectories)
+
+        # rmdir refuses folders that aren't empty, so nothing is listed first
         try:
-            if not os.listdir(dirpath):
-                print(f"  Removing empty folder: {dirpath}")
-                os.rmdir(dirpath)
-                deleted_count += 1
-        except Exception as e:
-            print(f"  [!] Could not remove {dirpath}: {e}")
-    
+            os.rmdir(dirpath)
+        except OSError as e:
+            if e.errno not in (errno.ENOTEMPTY, errno.EEXIST, errno.ENOENT):
+                print(f"  [!] Could not remove {dirpath}: {e}")
+            continue
+        print(f"  Removing empty folder: {dirpath}")
+        deleted_count += 1
+
     if deleted_count > 0:
         print(f"\nRemoved {deleted_count} empty folder(s)")
     else:
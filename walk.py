@@ -0,0 +1,91 @@
+"""Directory traversal helpers built on os.scandir."""
+
+import os
+from typing import Callable, Iterator, List, Optional, Tuple
+
+
+def _scan_dir(
+    dirpath: str, prune: Optional[Callable[[str], bool]]
+) -> Optional[Tuple[List[str], List[os.DirEntry]]]:
+    """
+    List one folder as (visible subfolder names, visible file entries), or
+    None if it can't be read. Subfolders for which prune(name) is true are
+    left out.
+    """
+    try:
+        with os.scandir(dirpath) as it:
+            entries = list(it)
+    except OSError:
+        return None
+
+    subdirs: List[str] = []
+    files: List[os.DirEntry] = []
+    for entry in entries:
+        if entry.name.startswith("."):
+            continue
+        if entry.is_dir(follow_symlinks=False):
+            if prune is None or not prune(entry.name):
+                subdirs.append(entry.name)
+        elif entry.is_file():
+            files.append(entry)
+    return subdirs, files
+
+
+def scan_tree(
+    root: str, prune: Optional[Callable[[str], bool]] = None
+) -> Iterator[Tuple[str, List[os.DirEntry]]]:
+    """
+    Walk a directory tree top-down, yielding (dirpath, file_entries) per folder.
+
+    Unlike os.walk, files are returned as DirEntry objects so callers can use
+    the type and stat information scandir already fetched. Hidden files and
+    folders (names starting with ".") are skipped, symlinked folders are not
+    followed, and unreadable folders are skipped silently. Folders for which
+    prune(name) is true are not entered.
+    """
+    stack: List[str] = [root]
+    while stack:
+        dirpath = stack.pop()
+        listing = _scan_dir(dirpath, prune)
+        if listing is None:
+            continue
+
+        subdirs, files = listing
+        # Push in reverse so folders are visited in listing order
+        stack.extend(os.path.join(dirpath, name) for name in reversed(subdirs))
+        yield dirpath, files
+
+
+def scan_tree_bottom_up(
+    root: str, prune: Optional[Callable[[str], bool]] = None
+) -> Iterator[Tuple[str, List[str], List[os.DirEntry]]]:
+    """
+    Walk a directory tree bottom-up, yielding (dirpath, subfolder names,
+    file_entries) per folder once all of its subfolders have been yielded,
+    like os.walk(topdown=False). Skips the same entries as scan_tree.
+    """
+    # A folder is pushed back with its listing and yielded once the
+    # subfolders pushed above it are done
+    stack: List[Tuple[str, Optional[Tuple[List[str], List[os.DirEntry]]]]] = [
+        (root, None)
+    ]
+    while stack:
+        dirpath, listing = stack.pop()
+        if listing is not None:
+            yield dirpath, listing[0], listing[1]
+            continue
+
+        listing = _scan_dir(dirpath, prune)
+        if listing is None:
+            continue
+
+        stack.append((dirpath, listing))
+        stack.extend(
+            (os.path.join(dirpath, name), None) for name in reversed(listing[0])
+        )
+
+
+def iter_files(root: str) -> Iterator[os.DirEntry]:
+    """Yield a DirEntry for every non-hidden file under root."""
+    for _, files in scan_tree(root):
+        yield from files